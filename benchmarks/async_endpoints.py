@@ -0,0 +1,130 @@
+"""
+Compare the sync (DRF) note endpoints with their async variants in
+notes/async_views.py by driving the ASGI application in-process with many
+concurrent clients.
+
+    python benchmarks/async_endpoints.py --email user@example.com [--endpoint list|retrieve|search]
+        [--note-id ID] [--query word] [--concurrency 50] [--requests 2000]
+
+Requests are authenticated as an existing user and only read data, so point
+the POSTGRES_* variables at a database that already has notes. Throttling is
+switched off for the run so the rate limits do not cap either path.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlencode
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.asgi import application
+from users.models import UserData
+
+
+async def request(path, query, token):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': urlencode(query).encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    sent = False
+    disconnected = asyncio.Event()
+    result = {}
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            result['status'] = message['status']
+
+    await application(scope, receive, send)
+    disconnected.set()
+    return result.get('status')
+
+
+async def run(name, path, query, token, concurrency, requests):
+    latencies = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def client():
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            status = await request(path, query, token)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f'{name:<6} {requests} requests in {elapsed:.2f}s  {requests / elapsed:8.1f} req/s  '
+        f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  errors {errors}'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--email', required=True, help='Existing user to authenticate as')
+    parser.add_argument('--endpoint', choices=['list', 'retrieve', 'search'], default='list')
+    parser.add_argument('--note-id', type=int, help='Note to fetch with --endpoint retrieve')
+    parser.add_argument('--query', default='note', help='Search text for --endpoint search')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.endpoint == 'retrieve' and args.note_id is None:
+        parser.error('--endpoint retrieve needs --note-id')
+    SimpleRateThrottle.THROTTLE_RATES = {'user': None, 'anon': None}
+    user = UserData.objects.get(email=args.email)
+    token = str(AccessToken.for_user(user))
+
+    paths = {
+        'list': ('/api/notes/', '/api/async/notes/', {}),
+        'retrieve': (f'/api/notes/{args.note_id}/', f'/api/async/notes/{args.note_id}/', {}),
+        'search': ('/api/search/', '/api/async/search/', {'q': args.query}),
+    }
+    sync_path, async_path, query = paths[args.endpoint]
+
+    async def compare():
+        # Warm up connections and caches before timing either path.
+        await request(sync_path, query, token)
+        await request(async_path, query, token)
+        await run('sync', sync_path, query, token, args.concurrency, args.requests)
+        await run('async', async_path, query, token, args.concurrency, args.requests)
+
+    asyncio.run(compare())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Measure the per-request database cost with and without persistent
+connections, using Django's request_started/request_finished signals to
+reproduce the connection handling of a real request.
+
+    python benchmarks/db_connections.py [--requests 500]
+
+Uses the database configured by the POSTGRES_* variables; every request
+runs a single `SELECT 1`, so the difference is the connection setup.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+MODES = [
+    ('new connection per request', 0, False),
+    ('persistent', 600, False),
+    ('persistent + health checks', 600, True),
+]
+
+
+def bench(name, conn_max_age, health_checks, requests):
+    connection.close()
+    connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+    connection.settings_dict['CONN_HEALTH_CHECKS'] = health_checks
+    start = time.perf_counter()
+    for _ in range(requests):
+        request_started.send(sender=None)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        request_finished.send(sender=None)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<28} {requests} requests in {elapsed:.3f}s  {elapsed / requests * 1000:.2f} ms/request')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    for name, conn_max_age, health_checks in MODES:
+        bench(name, conn_max_age, health_checks, args.requests)
+    connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Measure login throughput for each password hashing setting: logins per
+second on one core, and on the hashing pool with --workers threads.
+
+    python benchmarks/password_hashing.py [--seconds 3] [--workers N]
+
+A login is one verify_password() call, which is what dominates the token
+endpoint. Argon2 settings are skipped unless argon2-cffi is installed.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from users.hashers import TunedArgon2PasswordHasher, TunedPBKDF2PasswordHasher, TunedScryptPasswordHasher
+
+SETTINGS = [
+    ('pbkdf2 iterations=720000', TunedPBKDF2PasswordHasher, {'iterations': 720000}),
+    ('pbkdf2 iterations=260000', TunedPBKDF2PasswordHasher, {'iterations': 260000}),
+    ('scrypt n=2**14 r=8 p=1', TunedScryptPasswordHasher, {'work_factor': 2**14, 'block_size': 8, 'parallelism': 1}),
+    ('scrypt n=2**15 r=8 p=1', TunedScryptPasswordHasher, {'work_factor': 2**15, 'block_size': 8, 'parallelism': 1, 'maxmem': 2**26}),
+    ('argon2 t=2 m=100MiB p=8', TunedArgon2PasswordHasher, {'time_cost': 2, 'memory_cost': 102400, 'parallelism': 8}),
+    ('argon2 t=3 m=64MiB p=1', TunedArgon2PasswordHasher, {'time_cost': 3, 'memory_cost': 65536, 'parallelism': 1}),
+]
+
+
+def logins_per_second(hasher, encoded, seconds, workers):
+    def run():
+        count = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            hasher.verify('benchmark-password', encoded)
+            count += 1
+        return count
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(lambda _: run(), range(workers))) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f'{"setting":<26} {"ms/login":>9} {"logins/s/core":>14} {f"logins/s x{args.workers}":>16}')
+    for name, hasher_class, params in SETTINGS:
+        with mock.patch.multiple(hasher_class, **params):
+            hasher = hasher_class()
+            try:
+                encoded = hasher.encode('benchmark-password', hasher.salt())
+            except ValueError as e:
+                print(f'{name:<26} skipped: {e}')
+                continue
+            single = logins_per_second(hasher, encoded, args.seconds, 1)
+            pooled = logins_per_second(hasher, encoded, args.seconds, args.workers)
+        print(f'{name:<26} {1000 / single:>9.1f} {single:>14.1f} {pooled:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Measure the per-request overhead of the throttle stores in core/throttling.py.
+
+    python benchmarks/throttle_store.py [--requests 20000] [--redis-url redis://localhost:6379/0]
+
+Without --redis-url (or THROTTLE_REDIS_URL) only the in-process store is
+measured. fakeredis is used for the Lua path when it is installed.
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import django
+django.setup()
+
+from core.throttling import LocalThrottleStore, RedisThrottleStore
+
+
+def bench(name, store, requests):
+    start = time.perf_counter()
+    for i in range(requests):
+        store.hit(f'user_{i % 100}', 10 ** 9, 60, time.time())
+    elapsed = time.perf_counter() - start
+    print(f'{name:<12} {requests} hits in {elapsed:.3f}s  {elapsed / requests * 1e6:.1f} us/request')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--redis-url', default=os.environ.get('THROTTLE_REDIS_URL'))
+    args = parser.parse_args()
+
+    bench('local', LocalThrottleStore(), args.requests)
+    try:
+        import fakeredis
+        bench('fakeredis', RedisThrottleStore(client=fakeredis.FakeRedis()), args.requests)
+    except ImportError:
+        pass
+    if args.redis_url:
+        bench('redis', RedisThrottleStore(url=args.redis_url), args.requests)
+
+
+if __name__ == '__main__':
+    main()
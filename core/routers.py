@@ -0,0 +1,126 @@
+"""
+Database routing for read replicas.
+
+Reads go to the primary unless a view opted in with ReplicaReadsMixin (or
+replica_reads()) for a safe request. A user who wrote recently is pinned to
+the primary for REPLICA_STICKY_SECONDS, so their own writes are visible
+even while the replicas lag behind.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+
+PIN_CACHE_ALIAS = 'notes'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def use_primary():
+    """Read from the primary inside the block, e.g. to fill a cache."""
+    return replica_reads(False)
+
+
+def _pin_key(user_id):
+    return f'replica:pin:{user_id}'
+
+
+def pin_to_primary(user_id):
+    caches[PIN_CACHE_ALIAS].set(_pin_key(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return caches[PIN_CACHE_ALIAS].get(_pin_key(user_id), False)
+
+
+async def ais_pinned(user_id):
+    return await caches[PIN_CACHE_ALIAS].aget(_pin_key(user_id), False)
+
+
+def can_read_from_replica(request):
+    return (
+        settings.DATABASE_REPLICAS
+        and request.method in SAFE_METHODS
+        and not is_pinned(request.user.pk)
+    )
+
+
+class ReplicaReadsMixin:
+    """
+    Route the reads of safe requests to a replica. Authentication still
+    reads the user from the primary.
+    """
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if can_read_from_replica(request):
+            self._replica_token = _replica_reads.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _replica_reads.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _wrote(request):
+    if not settings.DATABASE_REPLICAS or request.method in SAFE_METHODS:
+        return None
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+@sync_and_async_middleware
+def read_your_writes_middleware(get_response):
+    """
+    Pin users to the primary after any unsafe request. DRF authenticates in
+    the view, so the user is only known once the response is built.
+    """
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            response = await get_response(request)
+            user_id = _wrote(request)
+            if user_id is not None:
+                await caches[PIN_CACHE_ALIAS].aset(_pin_key(user_id), True, timeout=settings.REPLICA_STICKY_SECONDS)
+            return response
+    else:
+        def middleware(request):
+            response = get_response(request)
+            user_id = _wrote(request)
+            if user_id is not None:
+                pin_to_primary(user_id)
+            return response
+    return middleware
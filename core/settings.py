@@ -13,6 +13,7 @@ from datetime import timedelta
 from pathlib import Path
 import os
 import sys
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -57,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.routers.read_your_writes_middleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -81,7 +84,7 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_THROTTLE_RATES': {
         'anon': '8/minute',
@@ -97,6 +100,54 @@ if 'test' in sys.argv:
     }
 }
     
+# Shared throttle counters. Without a Redis URL each process keeps its own
+# counters in memory (see core/throttling.py).
+THROTTLE_REDIS_URL = os.environ.get("THROTTLE_REDIS_URL")
+THROTTLE_STORE = os.environ.get(
+    "THROTTLE_STORE",
+    'core.throttling.RedisThrottleStore' if THROTTLE_REDIS_URL else 'core.throttling.LocalThrottleStore',
+)
+
+# Read-through cache of serialized notes (see notes/cache.py).
+NOTE_CACHE_REDIS_URL = os.environ.get("NOTE_CACHE_REDIS_URL")
+NOTE_CACHE_TIMEOUT = int(os.environ.get("NOTE_CACHE_TIMEOUT", 300))
+NOTE_CACHE_MAX_ENTRIES = int(os.environ.get("NOTE_CACHE_MAX_ENTRIES", 10000))
+# Seconds a search results page stays cached; 0 disables the search cache.
+NOTE_SEARCH_CACHE_TIMEOUT = int(os.environ.get("NOTE_SEARCH_CACHE_TIMEOUT", 60))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'notes': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'notes',
+        'TIMEOUT': NOTE_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': NOTE_CACHE_MAX_ENTRIES,
+        },
+    },
+}
+
+if NOTE_CACHE_REDIS_URL:
+    CACHES['notes'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': NOTE_CACHE_REDIS_URL,
+        'TIMEOUT': NOTE_CACHE_TIMEOUT,
+    }
+
+# The notes cache also backs the authenticated user cache, the refresh token
+# blacklist filter and the replica pins, all of which must be seen by every
+# worker. Without NOTE_CACHE_REDIS_URL it lives in each process, so an
+# invalidation on one worker never reaches the others: notes, searches and
+# users are then loaded from the database, blacklisted tokens are always
+# checked against it and replicas are refused, unless
+# NOTE_CACHE_SINGLE_PROCESS says a single process serves every request.
+NOTE_CACHE_SHARED = bool(NOTE_CACHE_REDIS_URL) or os.environ.get("NOTE_CACHE_SINGLE_PROCESS", "").lower() in ('1', 'true', 'yes')
+if 'test' in sys.argv:
+    # The test runner is a single process.
+    NOTE_CACHE_SHARED = True
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=3),
@@ -105,6 +156,65 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True
 }
 
+# Seconds an authenticated user is served from the cache (see users/authentication.py).
+AUTH_USER_CACHE_TIMEOUT = int(os.environ.get("AUTH_USER_CACHE_TIMEOUT", 60))
+
+# Bloom filter in front of the refresh token blacklist (see users/blacklist.py).
+# The defaults hold about 800k tokens at a 1% false positive rate in 1 MB.
+TOKEN_BLACKLIST_BLOOM_BITS = int(os.environ.get("TOKEN_BLACKLIST_BLOOM_BITS", 1 << 23))
+TOKEN_BLACKLIST_BLOOM_HASHES = int(os.environ.get("TOKEN_BLACKLIST_BLOOM_HASHES", 7))
+
+# Hasher for new passwords: pbkdf2, scrypt or argon2 (argon2 needs
+# argon2-cffi). Existing hashes are upgraded on login; see users/hashers.py.
+# Cost parameters left at 0 keep Django's defaults.
+PASSWORD_HASHER = os.environ.get("PASSWORD_HASHER", "pbkdf2").lower()
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get("PASSWORD_PBKDF2_ITERATIONS", 0))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.environ.get("PASSWORD_SCRYPT_WORK_FACTOR", 0))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.environ.get("PASSWORD_SCRYPT_BLOCK_SIZE", 0))
+PASSWORD_SCRYPT_PARALLELISM = int(os.environ.get("PASSWORD_SCRYPT_PARALLELISM", 0))
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get("PASSWORD_ARGON2_TIME_COST", 0))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get("PASSWORD_ARGON2_MEMORY_COST", 0))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get("PASSWORD_ARGON2_PARALLELISM", 0))
+# Threads hashing passwords at once, per process.
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+
+_PASSWORD_HASHERS = {
+    'pbkdf2': 'users.hashers.TunedPBKDF2PasswordHasher',
+    'scrypt': 'users.hashers.TunedScryptPasswordHasher',
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+}
+if PASSWORD_HASHER not in _PASSWORD_HASHERS:
+    raise ImproperlyConfigured(f"PASSWORD_HASHER must be one of {', '.join(_PASSWORD_HASHERS)}.")
+PASSWORD_HASHERS = [
+    _PASSWORD_HASHERS[PASSWORD_HASHER],
+    *(hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+AUTHENTICATION_BACKENDS = ['users.backends.PooledHashingBackend']
+
+NOTES_PAGE_SIZE = int(os.environ.get("NOTES_PAGE_SIZE", 50))
+NOTES_MAX_PAGE_SIZE = int(os.environ.get("NOTES_MAX_PAGE_SIZE", 200))
+NOTES_BATCH_MAX_OPERATIONS = int(os.environ.get("NOTES_BATCH_MAX_OPERATIONS", 500))
+NOTES_SEARCH_MIN_RANK = float(os.environ.get("NOTES_SEARCH_MIN_RANK", 0))
+NOTES_SEARCH_TRIGRAM_THRESHOLD = float(os.environ.get("NOTES_SEARCH_TRIGRAM_THRESHOLD", 0.3))
+NOTES_SEARCH_SNIPPET_MAX_WORDS = int(os.environ.get("NOTES_SEARCH_SNIPPET_MAX_WORDS", 35))
+NOTES_SEARCH_SNIPPET_MIN_WORDS = int(os.environ.get("NOTES_SEARCH_SNIPPET_MIN_WORDS", 15))
+NOTES_SEARCH_SNIPPET_MAX_FRAGMENTS = int(os.environ.get("NOTES_SEARCH_SNIPPET_MAX_FRAGMENTS", 2))
+NOTES_SYNC_OVERLAP_SECONDS = int(os.environ.get("NOTES_SYNC_OVERLAP_SECONDS", 5))
+# Days of tombstones kept for sync; older tokens must do a full sync.
+NOTES_SYNC_RETENTION_DAYS = int(os.environ.get("NOTES_SYNC_RETENTION_DAYS", 30))
+NOTES_EXPORT_CHUNK_SIZE = int(os.environ.get("NOTES_EXPORT_CHUNK_SIZE", 500))
+NOTES_IMPORT_CHUNK_SIZE = int(os.environ.get("NOTES_IMPORT_CHUNK_SIZE", 500))
+NOTES_IMPORT_MAX_NOTE_SIZE = int(os.environ.get("NOTES_IMPORT_MAX_NOTE_SIZE", 1024 * 1024))
+
+# Background jobs (see notes/jobs.py), run by `python manage.py run_jobs`.
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1))
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
+JOB_RETRY_DELAY = int(os.environ.get("JOB_RETRY_DELAY", 30))
+# Running jobs older than this are assumed to have lost their worker.
+JOB_TIMEOUT = int(os.environ.get("JOB_TIMEOUT", 15 * 60))
+
 AUTH_USER_MODEL = 'users.UserData'
 
 # Database
@@ -126,12 +236,44 @@ DATABASES = {
         'PASSWORD': os.environ.get("POSTGRES_PASSWORD"),
         'HOST': os.environ.get("POSTGRES_HOST"),
         'PORT': os.environ.get("POSTGRES_PORT"),
-        # 'OPTIONS': {
-        #     'sslmode': 'require',
-        # },
+        # Keep connections open between requests instead of paying for the
+        # TCP/TLS handshake and authentication every time, and check that a
+        # reused connection is still alive before the first query.
+        'CONN_MAX_AGE': int(os.environ.get("POSTGRES_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': os.environ.get("POSTGRES_CONN_HEALTH_CHECKS", "true").lower() in ('1', 'true', 'yes'),
+        # Server-side cursors do not survive transaction pooling (PgBouncer).
+        'DISABLE_SERVER_SIDE_CURSORS': os.environ.get("POSTGRES_TRANSACTION_POOLING", "").lower() in ('1', 'true', 'yes'),
+        'OPTIONS': {
+            # 'sslmode': 'require',
+        },
     }
 }
 
+# Read replicas as a comma separated list of host[:port][/database]; the
+# other connection parameters are the primary's. Safe requests to the note
+# read endpoints go to a replica unless the user wrote in the last
+# REPLICA_STICKY_SECONDS (see core/routers.py).
+POSTGRES_REPLICAS = [replica.strip() for replica in os.environ.get("POSTGRES_REPLICAS", "").split(',') if replica.strip()]
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", 5))
+if POSTGRES_REPLICAS and not NOTE_CACHE_SHARED:
+    # Pins live in the notes cache; a pin set by one worker must reach all of them.
+    raise ImproperlyConfigured("POSTGRES_REPLICAS requires NOTE_CACHE_REDIS_URL (or NOTE_CACHE_SINGLE_PROCESS) for read-your-writes pinning.")
+DATABASE_REPLICAS = []
+for index, replica in enumerate(POSTGRES_REPLICAS):
+    address, _, name = replica.partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
 # if 'test' in sys.argv:
 #     DATABASES['default'] = {
 #         'ENGINE': 'django.db.backends.sqlite3',
@@ -0,0 +1,120 @@
+"""
+Rate throttles backed by a store shared between worker processes.
+
+DRF's default throttles keep a request history list per key in the local
+cache, so every worker counts on its own and the effective limit is
+multiplied by the number of workers. The throttles below delegate to a
+``THROTTLE_STORE`` that implements a sliding-window counter with a single
+atomic call per request.
+"""
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class LocalThrottleStore:
+    """
+    In-process stand-in for RedisThrottleStore, used in tests and when no
+    Redis server is configured. Limits are only shared between threads.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._pruned_windows = {}
+
+    def hit(self, key, limit, window, now):
+        current_window = int(now // window)
+        elapsed = (now % window) / window
+        with self._lock:
+            previous = self._counters.get((key, window, current_window - 1), 0)
+            current = self._counters.get((key, window, current_window), 0)
+            if previous * (1 - elapsed) + current >= limit:
+                return False, window * (1 - elapsed)
+            self._counters[(key, window, current_window)] = current + 1
+            self._prune(window, current_window)
+        return True, 0
+
+    def _prune(self, window, current_window):
+        # Drop counters older than the previous window, once per window.
+        if self._pruned_windows.get(window) == current_window:
+            return
+        self._pruned_windows[window] = current_window
+        stale = [counter for counter in self._counters if counter[1] == window and counter[2] < current_window - 1]
+        for counter in stale:
+            del self._counters[counter]
+
+
+SLIDING_WINDOW_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local previous = tonumber(redis.call('GET', KEYS[1]) or '0')
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+if previous * (1 - elapsed) + current >= limit then
+    return 0
+end
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], window * 2)
+return 1
+"""
+
+
+class RedisThrottleStore:
+    """
+    Sliding-window counter kept in Redis (or any server speaking the Redis
+    protocol). The read, check and increment run as one Lua script, so each
+    throttled request costs a single round trip.
+    """
+    def __init__(self, url=None, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url or settings.THROTTLE_REDIS_URL)
+        self.client = client
+        self.script = client.register_script(SLIDING_WINDOW_SCRIPT)
+
+    def hit(self, key, limit, window, now):
+        current_window = int(now // window)
+        elapsed = (now % window) / window
+        keys = [f'throttle:{key}:{window}:{current_window - 1}', f'throttle:{key}:{window}:{current_window}']
+        allowed = self.script(keys=keys, args=[limit, window, elapsed])
+        if allowed:
+            return True, 0
+        return False, window * (1 - elapsed)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_throttle_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.THROTTLE_STORE)()
+    return _store
+
+
+class SharedRateThrottleMixin:
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self._wait = get_throttle_store().hit(self.key, self.num_requests, self.duration, self.timer())
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class SharedUserRateThrottle(SharedRateThrottleMixin, UserRateThrottle):
+    pass
+
+
+class SharedAnonRateThrottle(SharedRateThrottleMixin, AnonRateThrottle):
+    pass
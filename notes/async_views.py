@@ -0,0 +1,168 @@
+"""
+Async-native versions of the busiest note endpoints, for ASGI deployments.
+
+DRF 3.14 views are synchronous, so under ASGI every request to the views in
+views.py holds a worker thread from start to finish. The views below
+authenticate, throttle, read the caches and query through Django's async
+ORM instead, so one worker can serve many slow clients at once. Work that
+Django cannot run asynchronously (transactions, DRF's cursor pagination)
+is handed to a thread for just that step.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from core.routers import ais_pinned, replica_reads
+from core.throttling import SharedUserRateThrottle, SharedAnonRateThrottle
+from users.authentication import CachedJWTAuthentication
+from .cache import aget_or_load_note, aget_or_load_search
+from .models import Note
+from .pagination import NoteCursorPagination, NoteSearchPagination
+from .search import aget_snippets, trigram_threshold
+from .serializers import NoteReadSerializer
+from .views import (
+    NOTE_SEARCH_FIELDS, build_search_queryset, get_requested_fields, parse_search_params,
+    note_payload, search_cache_params, select_requested_fields, update_sharing,
+)
+
+
+def error_response(exc, authenticator=None):
+    data = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+    response = JsonResponse(data, status=exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)) and authenticator:
+        response['WWW-Authenticate'] = authenticator.authenticate_header(None)
+    if isinstance(exc, exceptions.Throttled) and exc.wait is not None:
+        response['Retry-After'] = '%d' % exc.wait
+    return response
+
+
+class AsyncNoteView(View):
+    """
+    Base class giving plain async Django views the same JWT authentication,
+    IsAuthenticated permission and throttles as the DRF note views. Handlers
+    receive a DRF Request, so the helpers in views.py can be reused.
+    """
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Requests are authenticated by bearer token, so CSRF does not apply.
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        authenticator = CachedJWTAuthentication()
+        try:
+            result = await authenticator.aauthenticate(request)
+            request.user = result[0] if result else AnonymousUser()
+            if not request.user.is_authenticated:
+                raise exceptions.NotAuthenticated()
+            await self.check_throttles(request)
+            use_replica = (
+                settings.DATABASE_REPLICAS and request.method in ('GET', 'HEAD')
+                and not await ais_pinned(request.user.pk)
+            )
+            with replica_reads(bool(use_replica)):
+                return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return error_response(exc, authenticator)
+
+    async def check_throttles(self, request):
+        waits = []
+        for throttle in [throttle_class() for throttle_class in self.throttle_classes]:
+            # The shared store may be Redis, so hit it off the event loop.
+            if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, self):
+                waits.append(throttle.wait())
+        if waits:
+            raise exceptions.Throttled(max(waits))
+
+
+class AsyncNoteListView(AsyncNoteView):
+    async def get(self, request):
+        fields = get_requested_fields(request)
+        queryset = select_requested_fields(Note.objects.filter(user=request.user), fields)
+        paginator = NoteCursorPagination()
+        # DRF's cursor pagination evaluates the page synchronously.
+        page = await sync_to_async(paginator.paginate_queryset)(queryset, request, view=self)
+        serializer = NoteReadSerializer(page, many=True, fields=fields)
+        return JsonResponse({
+            'detail': 'Notes Fetched Successfully',
+            'Notes': serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncNoteDetailView(AsyncNoteView):
+    async def get(self, request, pk):
+        fields = get_requested_fields(request)
+
+        async def load():
+            return note_payload(await Note.objects.defer('search_vector').aget(pk=pk))
+
+        try:
+            note = await aget_or_load_note(pk, load)
+        except Note.DoesNotExist:
+            return JsonResponse({"detail": "Note not found."}, status=status.HTTP_404_NOT_FOUND)
+        if note['user'] == request.user.id or note['public'] or request.user.id in note['shared_with']:
+            if fields is not None:
+                note = {name: value for name, value in note.items() if name in fields}
+            return JsonResponse({'detail': 'Note retrieved successfully', 'note': note}, status=status.HTTP_200_OK)
+        return JsonResponse({"detail": "You do not have permission to access this note."}, status=status.HTTP_403_FORBIDDEN)
+
+
+class AsyncSearchView(AsyncNoteView):
+    async def get(self, request):
+        try:
+            params = parse_search_params(request.query_params)
+        except ValueError as error:
+            return JsonResponse({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        queryset, query = build_search_queryset(params, request.user)
+        fields = get_requested_fields(request) or [*NOTE_SEARCH_FIELDS, 'snippet']
+        queryset = select_requested_fields(queryset, fields)
+        paginator = NoteSearchPagination()
+
+        def fuzzy_page():
+            with trigram_threshold(settings.NOTES_SEARCH_TRIGRAM_THRESHOLD):
+                return paginator.paginate_queryset(queryset, request, view=self)
+
+        async def load():
+            if params['fuzzy']:
+                # The trigram threshold is set inside a transaction, which the
+                # async ORM cannot open.
+                page = await sync_to_async(fuzzy_page)()
+            else:
+                page = await paginator.apaginate_queryset(queryset, request)
+            notes = NoteReadSerializer(page, many=True, fields=fields).data
+            if 'snippet' in fields:
+                snippets = await aget_snippets([note.pk for note in page], query)
+                for note, data in zip(page, notes):
+                    data['snippet'] = snippets.get(note.pk, '')
+            return {'notes': notes, 'has_next': paginator.has_next}
+
+        paginator.bind(request)
+        result = await aget_or_load_search(
+            request.user.pk, search_cache_params(params, fields, paginator), load, public=params['scope'] in ('public', 'all'),
+        )
+        paginator.has_next = result['has_next']
+        return JsonResponse({
+            'detail': 'List of notes matching the search query',
+            'notes': result['notes'],
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        }, status=status.HTTP_200_OK)
+
+
+class AsyncShareView(AsyncNoteView):
+    share = True
+
+    async def post(self, request, pk):
+        # Sharing writes in a transaction, which Django only offers synchronously.
+        response = await sync_to_async(update_sharing)(request, [pk], share=self.share)
+        return JsonResponse(response.data, status=response.status_code)
@@ -0,0 +1,218 @@
+"""
+Versioned read-through caches for serialized notes and search results.
+
+Each note has a version counter in the cache and its payload is stored
+under a key that includes the version. Writes bump the version instead of
+deleting the payload, so a reader that loaded the note before the write
+can only repopulate an entry that is never read again.
+
+Search results are cached the same way, keyed by a per-user generation
+counter (plus a shared one for public notes) that any change to a note the
+user can read bumps.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from core.routers import use_primary
+
+CACHE_ALIAS = 'notes'
+PUBLIC_GENERATION_KEY = 'search:public:generation'
+
+
+def get_note_cache():
+    return caches[CACHE_ALIAS]
+
+
+def _new_version():
+    # Time based so that a version key lost to eviction never restarts at a
+    # value whose payload may still be cached.
+    return int(time.time() * 1000)
+
+
+def _version_key(pk):
+    # Always the integer id, so "/notes/07/" and "/notes/7/" share one entry.
+    return f'note:{int(pk)}:version'
+
+
+def _payload_key(pk, version):
+    return f'note:{int(pk)}:v{version}'
+
+
+def _generation_key(user_id):
+    return f'search:user:{user_id}:generation'
+
+
+def _get_counter(cache, key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+async def _aget_counter(cache, key):
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _new_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def _bump(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+def _count(cache, key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+async def _acount(cache, key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        if not await cache.aadd(key, 1, timeout=None):
+            await cache.aincr(key)
+
+
+def get_or_load_note(pk, loader):
+    """
+    Return the cached payload for note `pk`, calling `loader()` to build and
+    cache it on a miss. Exceptions raised by the loader propagate. Nothing
+    is cached unless the cache is shared between processes.
+    """
+    if not settings.NOTE_CACHE_SHARED:
+        return loader()
+    cache = get_note_cache()
+    version = _get_counter(cache, _version_key(pk))
+    payload = cache.get(_payload_key(pk, version))
+    if payload is not None:
+        _count(cache, 'note_cache:hits')
+        return payload
+    _count(cache, 'note_cache:misses')
+    # A lagging replica must not fill the cache for the new version.
+    with use_primary():
+        payload = loader()
+    cache.set(_payload_key(pk, version), payload)
+    return payload
+
+
+async def aget_or_load_note(pk, loader):
+    """Async variant of get_or_load_note; `loader` is a coroutine function."""
+    if not settings.NOTE_CACHE_SHARED:
+        return await loader()
+    cache = get_note_cache()
+    version = await _aget_counter(cache, _version_key(pk))
+    payload = await cache.aget(_payload_key(pk, version))
+    if payload is not None:
+        await _acount(cache, 'note_cache:hits')
+        return payload
+    await _acount(cache, 'note_cache:misses')
+    with use_primary():
+        payload = await loader()
+    await cache.aset(_payload_key(pk, version), payload)
+    return payload
+
+
+def invalidate_note(pk):
+    _bump(get_note_cache(), _version_key(pk))
+
+
+def invalidate_notes(pks):
+    pks = list(pks)
+    for pk in pks:
+        invalidate_note(pk)
+    # Bump again once the write is visible to other connections, so a reader
+    # that cached the pre-commit row in between is not served afterwards.
+    transaction.on_commit(lambda: [invalidate_note(pk) for pk in pks])
+
+
+def _search_key(user_id, generation, params):
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode()).hexdigest()
+    return f'search:user:{user_id}:g{generation}:{digest}'
+
+
+def get_or_load_search(user_id, params, loader, public=False):
+    """
+    Return the cached search result for `params` (a dict of normalized
+    search parameters, including the page), calling `loader()` on a miss.
+    `public` adds the public generation to the key for scopes that include
+    other users' public notes.
+    """
+    if not settings.NOTE_CACHE_SHARED:
+        return loader()
+    cache = get_note_cache()
+    generation = _get_counter(cache, _generation_key(user_id))
+    if public:
+        generation = f'{generation}:{_get_counter(cache, PUBLIC_GENERATION_KEY)}'
+    key = _search_key(user_id, generation, params)
+    result = cache.get(key)
+    if result is not None:
+        _count(cache, 'search_cache:hits')
+        return result
+    _count(cache, 'search_cache:misses')
+    with use_primary():
+        result = loader()
+    cache.set(key, result, timeout=settings.NOTE_SEARCH_CACHE_TIMEOUT)
+    return result
+
+
+async def aget_or_load_search(user_id, params, loader, public=False):
+    """Async variant of get_or_load_search; `loader` is a coroutine function."""
+    if not settings.NOTE_CACHE_SHARED:
+        return await loader()
+    cache = get_note_cache()
+    generation = await _aget_counter(cache, _generation_key(user_id))
+    if public:
+        generation = f'{generation}:{await _aget_counter(cache, PUBLIC_GENERATION_KEY)}'
+    key = _search_key(user_id, generation, params)
+    result = await cache.aget(key)
+    if result is not None:
+        await _acount(cache, 'search_cache:hits')
+        return result
+    await _acount(cache, 'search_cache:misses')
+    with use_primary():
+        result = await loader()
+    await cache.aset(key, result, timeout=settings.NOTE_SEARCH_CACHE_TIMEOUT)
+    return result
+
+
+def _invalidate_searches_now(user_ids, public):
+    cache = get_note_cache()
+    for user_id in user_ids:
+        _bump(cache, _generation_key(user_id))
+    if public:
+        _bump(cache, PUBLIC_GENERATION_KEY)
+
+
+def invalidate_searches(user_ids, public=False):
+    user_ids = set(user_ids)
+    _invalidate_searches_now(user_ids, public)
+    transaction.on_commit(lambda: _invalidate_searches_now(user_ids, public))
+
+
+def cache_stats():
+    cache = get_note_cache()
+    return {
+        'hits': cache.get('note_cache:hits', 0),
+        'misses': cache.get('note_cache:misses', 0),
+    }
+
+
+def search_cache_stats():
+    cache = get_note_cache()
+    return {
+        'hits': cache.get('search_cache:hits', 0),
+        'misses': cache.get('search_cache:misses', 0),
+    }
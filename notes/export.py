@@ -0,0 +1,63 @@
+"""
+Streaming export of a user's notes.
+
+Notes are read through a server-side cursor, NOTES_EXPORT_CHUNK_SIZE rows
+(and their shares) at a time, and each chunk is written out once it has
+been serialized, so memory use does not grow with the number of notes.
+"""
+import re
+from itertools import islice
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.utils.encoders import JSONEncoder
+
+from .serializers import NoteReadSerializer
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def encode_notes(queryset, fields=None):
+    """Yield lists of JSON encoded notes, one list per database chunk."""
+    chunk_size = settings.NOTES_EXPORT_CHUNK_SIZE
+    serializer = NoteReadSerializer(fields=fields)
+    encoder = JSONEncoder(ensure_ascii=False)
+    notes = queryset.iterator(chunk_size=chunk_size)
+    for chunk in chunked(notes, chunk_size):
+        yield [encoder.encode(serializer.to_representation(note)) for note in chunk]
+
+
+def stream_notes(queryset, export_format, fields=None):
+    chunks = encode_notes(queryset, fields)
+    if export_format == 'ndjson':
+        for chunk in chunks:
+            yield ''.join(f'{note}\n' for note in chunk).encode()
+        return
+
+    yield b'['
+    separator = ''
+    for chunk in chunks:
+        yield (separator + ','.join(chunk)).encode()
+        separator = ','
+    yield b']\n'
+
+
+def compress_if_accepted(request, response):
+    """Gzip a streaming response when the client accepts it, as GZipMiddleware does."""
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+        response.streaming_content = compress_sequence(response.streaming_content)
+        response['Content-Encoding'] = 'gzip'
+    return response
@@ -0,0 +1,123 @@
+"""
+Streaming import of notes from NDJSON files and zip archives of Markdown
+files.
+
+Records are read one at a time, validated and inserted
+NOTES_IMPORT_CHUNK_SIZE at a time with one bulk INSERT per chunk, so memory
+use does not grow with the size of the upload. The search vector trigger
+fills search_vector within that INSERT.
+"""
+import json
+import zipfile
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache import invalidate_searches
+from .export import chunked
+from .models import Note
+from .serializers import NoteContentSerializer
+
+IMPORT_FORMATS = {
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.zip': 'markdown',
+}
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+
+
+def import_format(filename):
+    return IMPORT_FORMATS.get(PurePosixPath(filename).suffix.lower())
+
+
+def read_ndjson(file):
+    """Yield (line number, note data, error) for each line of the binary file."""
+    max_size = settings.NOTES_IMPORT_MAX_NOTE_SIZE
+    number = 0
+    # Bounded reads, so one huge line is never held in memory.
+    while line := file.readline(max_size + 1):
+        number += 1
+        if len(line) > max_size and not line.endswith(b'\n'):
+            while line and not line.endswith(b'\n'):
+                line = file.readline(max_size + 1)
+            yield number, None, f'Line is longer than {max_size} bytes.'
+            continue
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line), None
+        except ValueError:
+            yield number, None, 'Invalid JSON.'
+
+
+def read_markdown(name, text):
+    # A leading "# Heading" is the title, otherwise the file name is.
+    first_line, _, rest = text.lstrip('\ufeff').partition('\n')
+    if first_line.startswith('# '):
+        return {'title': first_line[2:].strip(), 'content': rest.strip()}
+    return {'title': PurePosixPath(name).stem, 'content': text.strip()}
+
+
+def read_markdown_zip(file):
+    """Yield (file name, note data, error) for each Markdown file in the archive."""
+    max_size = settings.NOTES_IMPORT_MAX_NOTE_SIZE
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith('__MACOSX/') or not name.lower().endswith(MARKDOWN_SUFFIXES):
+                continue
+            # The sizes in the archive are not trusted, only what decompresses.
+            with archive.open(info) as member:
+                data = member.read(max_size + 1)
+            if len(data) > max_size:
+                yield name, None, f'File is larger than {max_size} bytes.'
+                continue
+            try:
+                yield name, read_markdown(name, data.decode()), None
+            except UnicodeDecodeError:
+                yield name, None, 'File is not UTF-8 encoded.'
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'markdown': read_markdown_zip,
+}
+
+
+def import_notes(user, records):
+    """
+    Create the user's notes from (position, data, error) records. Each chunk
+    is inserted in its own transaction; after each one this yields the
+    running totals and the errors found in that chunk.
+    """
+    imported = failed = 0
+    for chunk in chunked(records, settings.NOTES_IMPORT_CHUNK_SIZE):
+        notes, errors = [], []
+        for position, data, error in chunk:
+            if error is None:
+                serializer = NoteContentSerializer(data=data)
+                if serializer.is_valid():
+                    notes.append(Note(user=user, **serializer.validated_data))
+                    continue
+                error = serializer.errors
+            errors.append({'position': position, 'errors': error})
+
+        with transaction.atomic():
+            Note.objects.bulk_create(notes)
+            # Bulk inserts do not send post_save.
+            invalidate_searches([user.pk])
+        imported += len(notes)
+        failed += len(errors)
+        yield {'imported': imported, 'failed': failed, 'errors': errors}
+
+
+def stream_progress(progress):
+    """NDJSON body for the import endpoint: one line per chunk, then the totals."""
+    encoder = JSONEncoder(ensure_ascii=False)
+    totals = {'imported': 0, 'failed': 0}
+    for step in progress:
+        totals = {'imported': step['imported'], 'failed': step['failed']}
+        yield f'{encoder.encode(step)}\n'.encode()
+    yield f'{encoder.encode({"detail": "Import finished", **totals})}\n'.encode()
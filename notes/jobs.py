@@ -0,0 +1,124 @@
+"""
+A small job queue kept in Postgres, so heavy work can leave the request
+without an external broker.
+
+enqueue() inserts a Job row, in the caller's transaction: the job only
+becomes visible to workers if the request's writes commit. Workers
+(`manage.py run_jobs`) claim one pending job at a time with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can poll the same
+table without blocking each other or running a job twice. A failed job is
+retried JOB_MAX_ATTEMPTS times with exponential backoff, and a job left
+running longer than JOB_TIMEOUT (e.g. by a killed worker) is requeued.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def task(func):
+    """Register a function as a job, under its own name."""
+    _tasks[func.__name__] = func
+    return func
+
+
+def enqueue(name, payload=None, user=None):
+    if name not in _tasks:
+        raise ValueError(f'Unknown job {name!r}.')
+    return Job.objects.create(name=name, payload=payload or {}, user=user)
+
+
+def claim_job():
+    """Mark the next ready job as running and return it, or None."""
+    now = timezone.now()
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.PENDING, run_after__lte=now)
+            .order_by('run_after', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.RUNNING
+        job.attempts += 1
+        job.date_started = now
+        job.save(update_fields=['status', 'attempts', 'date_started'])
+    return job
+
+
+def run_job(job):
+    try:
+        result = _tasks[job.name](**job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < settings.JOB_MAX_ATTEMPTS:
+            job.status = Job.PENDING
+            job.run_after = timezone.now() + timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = Job.FAILED
+            job.date_finished = timezone.now()
+    else:
+        job.status = Job.DONE
+        job.result = result
+        job.error = ''
+        job.date_finished = timezone.now()
+    fields = ['status', 'result', 'error', 'run_after', 'date_finished']
+    try:
+        with transaction.atomic():
+            job.save(update_fields=fields)
+    except Exception:
+        # E.g. a result that is not JSON serializable; rerunning would not help.
+        job.status = Job.FAILED
+        job.result = None
+        job.error = traceback.format_exc()
+        job.date_finished = timezone.now()
+        job.save(update_fields=fields)
+    return job
+
+
+def requeue_stale_jobs():
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING, date_started__lt=cutoff)
+    stale.filter(attempts__lt=settings.JOB_MAX_ATTEMPTS).update(status=Job.PENDING, run_after=timezone.now())
+    stale.update(status=Job.FAILED, error='Timed out.', date_finished=timezone.now())
+
+
+def work(stop, burst=False):
+    """
+    Run jobs until `stop` (a threading.Event) is set, or, with `burst`,
+    until no job is ready. Each worker thread calls this with its own
+    database connection.
+    """
+    try:
+        while not stop.is_set():
+            try:
+                # Like a request boundary: drop connections that broke or expired.
+                close_old_connections()
+                job = claim_job()
+                if job is not None:
+                    run_job(job)
+                    continue
+                requeue_stale_jobs()
+            except Exception:
+                # E.g. the database went away; close_old_connections() drops
+                # the broken connection. A job left running is requeued once
+                # it times out.
+                if burst:
+                    raise
+                logger.exception('Job worker failed, retrying.')
+            else:
+                if burst:
+                    return
+            stop.wait(settings.JOB_POLL_INTERVAL)
+    finally:
+        connection.close()
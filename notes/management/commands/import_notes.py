@@ -0,0 +1,37 @@
+import zipfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from notes.importer import IMPORT_FORMATS, READERS, import_format, import_notes
+from users.models import UserData
+
+
+class Command(BaseCommand):
+    help = 'Import notes for a user from an NDJSON file or a zip archive of Markdown files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help=f'File to import ({", ".join(IMPORT_FORMATS)}).')
+        parser.add_argument('--email', required=True, help='Email of the user who will own the notes.')
+        parser.add_argument('--format', choices=sorted(READERS), help='Input format, instead of guessing it from the file extension.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or import_format(path.name)
+        if file_format is None:
+            raise CommandError(f'Unknown format for {path.name}, pass --format.')
+        try:
+            user = UserData.objects.get(email=options['email'])
+        except UserData.DoesNotExist:
+            raise CommandError(f'No user with email {options["email"]}.')
+
+        totals = {'imported': 0, 'failed': 0}
+        with path.open('rb') as file:
+            if file_format == 'markdown' and not zipfile.is_zipfile(file):
+                raise CommandError(f'{path.name} is not a zip archive.')
+            for step in import_notes(user, READERS[file_format](file)):
+                for error in step['errors']:
+                    self.stderr.write(f'{error["position"]}: {error["errors"]}')
+                totals = step
+                self.stdout.write(f'Imported {step["imported"]} notes, {step["failed"]} failed...')
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {totals["imported"]} notes, {totals["failed"]} failed.'))
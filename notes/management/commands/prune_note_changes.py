@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notes.models import NoteChange
+from notes.sync import sync_retention_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Delete sync tombstones older than NOTES_SYNC_RETENTION_DAYS in batches. Meant to run from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows deleted per statement.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        ids = NoteChange.objects.filter(date__lt=sync_retention_cutoff(timezone.now())).order_by('pk').values_list('pk', flat=True)
+
+        total = 0
+        while True:
+            batch = list(ids[:batch_size])
+            if not batch:
+                break
+            total += NoteChange.objects.filter(pk__in=batch).delete()[0]
+            self.stdout.write(f'Pruned {total} sync changes...')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} sync changes.'))
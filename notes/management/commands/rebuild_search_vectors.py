@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from notes.models import Note
+
+
+class Command(BaseCommand):
+    help = 'Backfill note search vectors in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of notes updated per statement.')
+        parser.add_argument('--all', action='store_true', help='Rebuild every note, not only those without a search vector.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Note.objects.all() if options['all'] else Note.objects.filter(search_vector__isnull=True)
+        ids = queryset.order_by('pk').values_list('pk', flat=True)
+
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            # Clearing the vector makes the notes_note trigger recompute it.
+            total += Note.objects.filter(pk__in=batch).update(search_vector=None)
+            last_pk = batch[-1]
+            self.stdout.write(f'Rebuilt {total} search vectors...')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} search vectors.'))
@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from notes.jobs import work
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue until stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes, for CPU bound jobs.')
+        parser.add_argument('--threads', type=int, default=1, help='Worker threads per process, for I/O bound jobs.')
+        parser.add_argument('--burst', action='store_true', help='Exit once no job is ready instead of polling.')
+
+    def handle(self, *args, **options):
+        processes, threads, burst = options['processes'], options['threads'], options['burst']
+        self.stdout.write(f'Running jobs with {processes} process(es) x {threads} thread(s).')
+        if processes == 1:
+            self.run_threads(threads, burst)
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=self.run_threads, args=(threads, burst)) for _ in range(processes)]
+        for child in children:
+            child.start()
+
+        # Pass SIGTERM (e.g. from a process manager) and SIGINT on to the
+        # children, which finish the jobs in hand, and wait for them.
+        def forward(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    os.kill(child.pid, signum)
+
+        handlers = {signum: signal.signal(signum, forward) for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            for child in children:
+                child.join()
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def run_threads(self, threads, burst):
+        stop = threading.Event()
+        # Finish the jobs in hand on Ctrl-C or SIGTERM, then exit.
+        handlers = {signum: signal.signal(signum, lambda *args: stop.set()) for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            if threads == 1:
+                work(stop, burst)
+                return
+            with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='job-worker') as pool:
+                for future in [pool.submit(work, stop, burst) for _ in range(threads)]:
+                    future.result()
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0004_alter_note_options_note_date_created_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['user', 'date_modified', 'id'], name='notes_note_user_id_06cdc5_idx'),
+        ),
+    ]
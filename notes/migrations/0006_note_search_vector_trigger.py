@@ -0,0 +1,40 @@
+from django.db import migrations
+
+
+SEARCH_VECTOR_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION notes_note_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT'
+       OR NEW.search_vector IS NULL
+       OR NEW.title IS DISTINCT FROM OLD.title
+       OR NEW.content IS DISTINCT FROM OLD.content THEN
+        NEW.search_vector :=
+            setweight(to_tsvector(COALESCE(NEW.title, '')), 'A') ||
+            setweight(to_tsvector(COALESCE(NEW.content, '')), 'B');
+    ELSE
+        NEW.search_vector := OLD.search_vector;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notes_note_search_vector_trigger
+    BEFORE INSERT OR UPDATE ON notes_note
+    FOR EACH ROW EXECUTE FUNCTION notes_note_search_vector_update();
+"""
+
+DROP_SEARCH_VECTOR_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS notes_note_search_vector_trigger ON notes_note;
+DROP FUNCTION IF EXISTS notes_note_search_vector_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0005_note_user_date_modified_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER_SQL, DROP_SEARCH_VECTOR_TRIGGER_SQL),
+    ]
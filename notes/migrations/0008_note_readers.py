@@ -0,0 +1,92 @@
+# Generated by Django 5.0.1 on 2026-10-18 11:49
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+READERS_TRIGGER_SQL = """
+CREATE OR REPLACE FUNCTION notes_note_readers_update() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        NEW.readers := ARRAY[NEW.user_id];
+    ELSIF pg_trigger_depth() = 1 THEN
+        -- Writes from the application never set readers themselves; only the
+        -- shared_with triggers below (which run one level deeper) do.
+        IF NEW.user_id IS DISTINCT FROM OLD.user_id THEN
+            NEW.readers := ARRAY[NEW.user_id] || ARRAY(
+                SELECT userdata_id FROM notes_note_shared_with
+                WHERE note_id = NEW.id AND userdata_id <> NEW.user_id
+            );
+        ELSE
+            NEW.readers := OLD.readers;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notes_note_readers_trigger
+    BEFORE INSERT OR UPDATE ON notes_note
+    FOR EACH ROW EXECUTE FUNCTION notes_note_readers_update();
+
+CREATE OR REPLACE FUNCTION notes_note_shared_with_readers_update() RETURNS trigger AS $$
+BEGIN
+    UPDATE notes_note SET readers = ARRAY[notes_note.user_id] || ARRAY(
+        SELECT userdata_id FROM notes_note_shared_with
+        WHERE note_id = notes_note.id AND userdata_id <> notes_note.user_id
+    )
+    WHERE notes_note.id IN (SELECT note_id FROM changed_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER notes_note_shared_with_insert_trigger
+    AFTER INSERT ON notes_note_shared_with
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notes_note_shared_with_readers_update();
+
+CREATE TRIGGER notes_note_shared_with_delete_trigger
+    AFTER DELETE ON notes_note_shared_with
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION notes_note_shared_with_readers_update();
+
+UPDATE notes_note SET readers = ARRAY[notes_note.user_id] || ARRAY(
+    SELECT userdata_id FROM notes_note_shared_with
+    WHERE note_id = notes_note.id AND userdata_id <> notes_note.user_id
+);
+"""
+
+DROP_READERS_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS notes_note_shared_with_delete_trigger ON notes_note_shared_with;
+DROP TRIGGER IF EXISTS notes_note_shared_with_insert_trigger ON notes_note_shared_with;
+DROP FUNCTION IF EXISTS notes_note_shared_with_readers_update();
+DROP TRIGGER IF EXISTS notes_note_readers_trigger ON notes_note;
+DROP FUNCTION IF EXISTS notes_note_readers_update();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0007_notechange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='readers',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.RunSQL(READERS_TRIGGER_SQL, DROP_READERS_TRIGGER_SQL),
+        migrations.AddIndex(
+            model_name='note',
+            index=django.contrib.postgres.indexes.GinIndex(condition=models.Q(('public', True)), fields=['search_vector'], name='notes_note_public_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['readers'], name='notes_note_readers_cc67ff_gin'),
+        ),
+    ]
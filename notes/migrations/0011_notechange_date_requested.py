@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0010_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notechange',
+            name='date_requested',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0011_notechange_date_requested'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notechange',
+            name='kind',
+            field=models.CharField(choices=[('shared', 'Shared'), ('unshared', 'Unshared'), ('deleted', 'Deleted'), ('cancelled', 'Cancelled')], max_length=10),
+        ),
+    ]
@@ -1,9 +1,27 @@
 from django.db import models
-from django.contrib.postgres.search import SearchVectorField, SearchVector
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.postgres.indexes import GinIndex
 from users.models import UserData 
 from django.utils import timezone
 
+class NoteQuerySet(models.QuerySet):
+    def with_access(self, user):
+        """
+        Annotate each note with is_owner and is_shared for the given user so
+        the owner/public/shared check is resolved by the database in the
+        same query that loads the note.
+        """
+        shares = Note.shared_with.through.objects.filter(note=models.OuterRef('pk'), userdata=user.pk)
+        return self.annotate(
+            is_owner=models.ExpressionWrapper(models.Q(user=user.pk), output_field=models.BooleanField()),
+            is_shared=models.Exists(shares),
+        )
+
+    def accessible_to(self, user):
+        # Notes the user owns or that are shared with them, via the GIN index on readers.
+        return self.filter(readers__contains=[user.pk])
+
 class Note(models.Model):
     user = models.ForeignKey(UserData, on_delete=models.CASCADE)
     title = models.CharField(max_length=255)
@@ -11,22 +29,109 @@ class Note(models.Model):
     public = models.BooleanField(default=False)
     shared_with = models.ManyToManyField(UserData, related_name='shared_notes', blank=True)
     search_vector = SearchVectorField(null=True, blank=True)
+    readers = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False)
     date_created = models.DateTimeField(auto_now_add=True)
     date_modified = models.DateTimeField(auto_now=True)
+
+    objects = NoteQuerySet.as_manager()
     
+    # search_vector is maintained by the notes_note_search_vector_trigger
+    # database trigger (see migration 0006) in the same statement as the write.
+    # readers (owner id plus shared_with ids) is maintained by the triggers in
+    # migration 0008 and only exists so access filters can use a GIN index.
+
     def __str__(self):
         return self.title
-    
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
-        Note.objects.filter(pk=self.pk).update(search_vector=(
-            SearchVector('title', weight='A') +
-            SearchVector('content', weight='B')
-        ))
-    
+
     class Meta:
         indexes = [
             models.Index(fields=['user']),
-            GinIndex(fields=['search_vector'])
+            models.Index(fields=['user', 'date_modified', 'id']),
+            GinIndex(fields=['search_vector']),
+            GinIndex(fields=['search_vector'], condition=models.Q(public=True), name='notes_note_public_search_gin'),
+            GinIndex(fields=['readers']),
+            GinIndex(fields=['title'], opclasses=['gin_trgm_ops'], name='notes_note_title_trgm'),
+            GinIndex(fields=['content'], opclasses=['gin_trgm_ops'], name='notes_note_content_trgm'),
         ]
         ordering = ['date_modified']
+
+class NoteChange(models.Model):
+    """
+    Access changes that do not show up in Note.date_modified: a note being
+    shared with, unshared from or deleted for a user. Used by the sync
+    endpoint to report newly shared notes and tombstones.
+    """
+    SHARED = 'shared'
+    UNSHARED = 'unshared'
+    DELETED = 'deleted'
+    # An unshare that found nothing to remove. Not reported by sync, only
+    # kept so an earlier deferred share does not apply after it.
+    CANCELLED = 'cancelled'
+    KIND_CHOICES = [
+        (SHARED, 'Shared'),
+        (UNSHARED, 'Unshared'),
+        (DELETED, 'Deleted'),
+        (CANCELLED, 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(UserData, on_delete=models.CASCADE, related_name='note_changes')
+    note_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    date = models.DateTimeField(auto_now_add=True)
+    # When a deferred change was requested; null when it was applied at once.
+    date_requested = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def record(cls, kind, note_ids, user_ids, date_requested=None):
+        cls.record_pairs(kind, [(note_id, user_id) for note_id in note_ids for user_id in user_ids], date_requested)
+
+    @classmethod
+    def record_pairs(cls, kind, pairs, date_requested=None):
+        cls.objects.bulk_create([
+            cls(user_id=user_id, note_id=note_id, kind=kind, date_requested=date_requested)
+            for note_id, user_id in pairs
+        ])
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date']),
+        ]
+
+class Job(models.Model):
+    """
+    A unit of background work, run by `manage.py run_jobs` (see
+    notes/jobs.py). `name` selects a function registered with @task and
+    `payload` holds its keyword arguments.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    user = models.ForeignKey(UserData, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_started = models.DateTimeField(null=True, blank=True)
+    date_finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.pk} ({self.status})'
+
+    class Meta:
+        indexes = [
+            # Workers only ever scan the jobs that are waiting to run.
+            models.Index(fields=['run_after', 'id'], condition=models.Q(status='pending'), name='notes_job_pending_idx'),
+            models.Index(fields=['date_started'], condition=models.Q(status='running'), name='notes_job_running_idx'),
+        ]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class NoteCursorPagination(CursorPagination):
+    # Keyset pagination over (date_modified, id), backed by the composite
+    # (user, date_modified, id) index so every page costs the same.
+    ordering = ('date_modified', 'id')
+    page_size = settings.NOTES_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.NOTES_MAX_PAGE_SIZE
+
+
+class NoteSearchPagination(LimitOffsetPagination):
+    # Ranked results cannot use a keyset, so search pages by limit/offset.
+    # It fetches one extra row instead of running COUNT(*) over every match.
+    default_limit = settings.NOTES_PAGE_SIZE
+    max_limit = settings.NOTES_MAX_PAGE_SIZE
+
+    def bind(self, request, has_next=False):
+        # Set up the links for a page that was served without a query.
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        self.has_next = has_next
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.bind(request)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    async def apaginate_queryset(self, queryset, request):
+        self.bind(request)
+        rows = [row async for row in queryset[self.offset:self.offset + self.limit + 1]]
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        if self.offset - self.limit <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, self.offset - self.limit)
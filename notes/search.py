@@ -0,0 +1,121 @@
+import re
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, TrigramSimilarity, TrigramWordSimilarity,
+)
+from django.db import connection, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Replace
+
+SEARCH_TYPES = ('websearch', 'plain', 'phrase')
+SEARCH_SCOPES = ('own', 'shared', 'public', 'all')
+
+HTML_ESCAPES = [('&', '&amp;'), ('<', '&lt;'), ('>', '&gt;'), ('"', '&quot;'), ("'", '&#x27;')]
+
+# Bare words ending in '*' outside of quotes, e.g. "meet*".
+PREFIX_TERM = re.compile(r'(?<![\S"])(\w+)\*(?![\S"])')
+
+
+def build_search_query(text, search_type='websearch'):
+    """
+    Build the tsquery for a search. websearch queries follow
+    websearch_to_tsquery ("quoted phrases", -negation, OR) and additionally
+    treat `word*` as a prefix match.
+    """
+    if search_type != 'websearch':
+        return SearchQuery(text, search_type=search_type)
+
+    prefixes = PREFIX_TERM.findall(text)
+    rest = PREFIX_TERM.sub(' ', text).strip()
+    query = SearchQuery(rest, search_type='websearch') if rest else None
+    if prefixes:
+        prefix_query = SearchQuery(' & '.join(f'{word}:*' for word in prefixes), search_type='raw')
+        query = prefix_query if query is None else query & prefix_query
+    return query
+
+
+def search_filter_and_score(text, query, fuzzy=False):
+    """
+    Return the (filter, score) pair for a search. Fuzzy searches also match
+    titles and content by trigram similarity (title % text, text <% content),
+    which the pg_trgm GIN indexes answer, and add the similarity to the
+    full-text rank.
+    """
+    match = Q(search_vector=query)
+    score = SearchRank(F('search_vector'), query)
+    if fuzzy:
+        match |= Q(title__trigram_similar=text) | Q(content__trigram_word_similar=text)
+        score = score + TrigramSimilarity('title', text) + TrigramWordSimilarity(text, 'content')
+    return match, score
+
+
+@contextmanager
+def trigram_threshold(threshold):
+    """
+    Run the enclosed queries with pg_trgm's similarity thresholds set to
+    `threshold`. The % and <% operators (and so the trigram indexes) use
+    these settings, which SET LOCAL confines to the transaction.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, true), "
+                "set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(threshold), str(threshold)],
+            )
+        yield
+
+
+def filter_search_scope(queryset, scope, user):
+    """
+    Restrict a note queryset to a search scope. Every branch is backed by an
+    index (user, readers GIN, or the partial GIN index on public notes) so
+    the planner can combine it with the search_vector GIN index.
+    """
+    if scope == 'own':
+        return queryset.filter(user=user)
+    if scope == 'shared':
+        return queryset.filter(readers__contains=[user.pk]).exclude(user=user)
+    if scope == 'public':
+        return queryset.filter(public=True)
+    return queryset.filter(Q(readers__contains=[user.pk]) | Q(public=True))
+
+
+def _html_escaped(field):
+    # Like django.utils.html.escape, in SQL; '&' must be replaced first.
+    expression = F(field)
+    for character, entity in HTML_ESCAPES:
+        expression = Replace(expression, Value(character), Value(entity))
+    return expression
+
+
+def snippet_values(note_ids, query):
+    """
+    Return (note id, highlighted snippet of the content) rows for the given
+    notes. Only called for the page being returned, so ts_headline never
+    runs over the full result set. The content is HTML escaped before it is
+    highlighted, so the <mark> tags are the only markup in a snippet.
+    """
+    from .models import Note
+
+    headline = SearchHeadline(
+        _html_escaped('content'),
+        query,
+        start_sel='<mark>',
+        stop_sel='</mark>',
+        max_words=settings.NOTES_SEARCH_SNIPPET_MAX_WORDS,
+        min_words=settings.NOTES_SEARCH_SNIPPET_MIN_WORDS,
+        max_fragments=settings.NOTES_SEARCH_SNIPPET_MAX_FRAGMENTS,
+    )
+    return Note.objects.filter(pk__in=note_ids).annotate(snippet=headline).values_list('pk', 'snippet')
+
+
+def get_snippets(note_ids, query):
+    """Return {note id: snippet} for the given notes."""
+    return dict(snippet_values(note_ids, query))
+
+
+async def aget_snippets(note_ids, query):
+    return {pk: snippet async for pk, snippet in snippet_values(note_ids, query)}
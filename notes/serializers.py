@@ -1,8 +1,38 @@
 from rest_framework import serializers
-from .models import Note
+from .models import Job, Note
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    A ModelSerializer that takes an additional `fields` argument that
+    controls which fields should be displayed.
+    """
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            allowed = set(fields)
+            for field_name in set(self.fields) - allowed:
+                self.fields.pop(field_name)
 
 class NoteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Note
         fields = ['id', 'user', 'title', 'content', 'public', 'shared_with', 'search_vector', 'date_created', 'date_modified']
 
+class NoteContentSerializer(serializers.ModelSerializer):
+    # Validates the writable text of a note without looking up its owner.
+    class Meta:
+        model = Note
+        fields = ['title', 'content']
+
+class NoteReadSerializer(DynamicFieldsModelSerializer):
+    # API representation of a note, without internal fields such as search_vector.
+    class Meta:
+        model = Note
+        fields = ['id', 'user', 'title', 'content', 'public', 'shared_with', 'date_created', 'date_modified']
+
+class JobSerializer(serializers.ModelSerializer):
+    # Tracebacks stay in the admin; clients only see the status.
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'result', 'date_created', 'date_started', 'date_finished']
@@ -0,0 +1,61 @@
+from functools import reduce
+from operator import or_
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+
+from .cache import invalidate_notes, invalidate_searches
+from .models import Note, NoteChange
+
+
+def apply_sharing(owner_id, note_ids, user_ids, share, requested_at=None):
+    """
+    Share (or unshare) notes with users, writing the shared_with rows in
+    bulk. Access must already have been checked.
+
+    A deferred change passes the time it was requested as `requested_at`.
+    Pairs of note and user whose sharing was changed by a later request
+    are then left alone, so requests take effect in the order they were
+    made however late the job runs.
+    """
+    user_ids = list(user_ids)
+    through = Note.shared_with.through
+    with transaction.atomic():
+        # Serializes sharing changes to the same notes, so the check below
+        # sees every change committed before this one.
+        note_ids = list(Note.objects.select_for_update().filter(pk__in=note_ids).order_by('pk').values_list('pk', flat=True))
+        pairs = {(note_id, user_id) for note_id in note_ids for user_id in user_ids}
+        if requested_at is not None and pairs:
+            pairs -= set(
+                NoteChange.objects.filter(note_id__in=note_ids, user_id__in=user_ids, kind__in=[NoteChange.SHARED, NoteChange.UNSHARED, NoteChange.CANCELLED])
+                .alias(requested=Coalesce('date_requested', 'date'))
+                .filter(requested__gt=requested_at)
+                .values_list('note_id', 'user_id')
+            )
+        if not pairs:
+            return
+        if share:
+            through.objects.bulk_create(
+                [through(note_id=note_id, userdata_id=user_id) for note_id, user_id in pairs],
+                ignore_conflicts=True,
+            )
+        else:
+            notes_by_user = {}
+            for note_id, user_id in pairs:
+                notes_by_user.setdefault(user_id, []).append(note_id)
+            shares = through.objects.filter(reduce(or_, (
+                models.Q(userdata_id=user_id, note_id__in=user_note_ids) for user_id, user_note_ids in notes_by_user.items()
+            )))
+            # Only users who had the note get a tombstone; the others must
+            # not learn its id from sync.
+            removed = set(shares.values_list('note_id', 'userdata_id'))
+            if pairs - removed:
+                NoteChange.record_pairs(NoteChange.CANCELLED, pairs - removed, requested_at)
+            pairs = removed
+            if not pairs:
+                return
+            shares.delete()
+        # Bulk writes to the through table do not send m2m_changed.
+        NoteChange.record_pairs(NoteChange.SHARED if share else NoteChange.UNSHARED, pairs, requested_at)
+        invalidate_notes({note_id for note_id, _ in pairs})
+        invalidate_searches({owner_id, *(user_id for _, user_id in pairs)})
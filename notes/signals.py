@@ -0,0 +1,114 @@
+from django.db.models import QuerySet
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from users.models import UserData
+from .cache import invalidate_notes, invalidate_searches
+from .models import Note, NoteChange
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def invalidate_note_on_write(sender, instance, **kwargs):
+    invalidate_notes([instance.pk])
+
+
+@receiver(post_save, sender=Note)
+def invalidate_searches_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if 'readers' in instance.get_deferred_fields():
+        user_ids = set(Note.shared_with.through.objects.filter(note_id=instance.pk).values_list('userdata_id', flat=True))
+    else:
+        user_ids = set(instance.readers)
+    user_ids.add(instance.user_id)
+    # A full save may have flipped the public flag, so only skip the shared
+    # public generation when the note is known to have stayed private.
+    public = instance.public or (not created and (update_fields is None or 'public' in update_fields))
+    invalidate_searches(user_ids, public=public)
+
+
+def _deleted_user_ids(origin):
+    if isinstance(origin, UserData):
+        return {origin.pk}
+    if isinstance(origin, QuerySet) and origin.model is UserData:
+        return set(origin.values_list('pk', flat=True))
+    return set()
+
+
+def _record_deleted(tombstones, user_ids, public):
+    invalidate_searches(user_ids, public=public)
+    NoteChange.objects.bulk_create([
+        NoteChange(user_id=user_id, note_id=note_id, kind=NoteChange.DELETED)
+        for note_id, user_id in tombstones
+    ])
+
+
+@receiver(pre_delete, sender=Note)
+def record_note_deleted(sender, instance, origin=None, **kwargs):
+    # readers (the owner plus every sharee) comes with rows that delete()
+    # collected. A note deleted directly may have been shared since it was
+    # loaded, so its readers are read again.
+    readers = instance.readers
+    if instance is origin or 'readers' in instance.get_deferred_fields():
+        readers = Note.objects.filter(pk=instance.pk).values_list('readers', flat=True).first() or []
+    user_ids = {instance.user_id, *readers}
+    if origin is None:
+        _record_deleted([(instance.pk, user_id) for user_id in user_ids], user_ids, instance.public)
+        return
+    # Collected on the object being deleted and written in bulk by the first
+    # post_delete: Django sends every pre_delete of a delete() before it.
+    pending = origin.__dict__.get('_deleted_notes')
+    if pending is None:
+        # Users removed together with their notes do not need tombstones.
+        pending = origin.__dict__['_deleted_notes'] = {'skip': _deleted_user_ids(origin), 'tombstones': [], 'user_ids': set(), 'public': False}
+    pending['tombstones'].extend((instance.pk, user_id) for user_id in user_ids - pending['skip'])
+    pending['user_ids'] |= user_ids
+    pending['public'] = pending['public'] or instance.public
+
+
+@receiver(post_delete, sender=Note)
+def write_note_tombstones(sender, instance, origin=None, **kwargs):
+    pending = getattr(origin, '__dict__', {}).pop('_deleted_notes', None)
+    if pending is not None:
+        _record_deleted(pending['tombstones'], pending['user_ids'], pending['public'])
+
+
+@receiver(m2m_changed, sender=Note.shared_with.through)
+def invalidate_note_on_share(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_notes([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        invalidate_notes(pk_set)
+    elif action == 'pre_clear':
+        invalidate_notes(instance.shared_notes.values_list('pk', flat=True))
+
+
+@receiver(m2m_changed, sender=Note.shared_with.through)
+def invalidate_searches_on_share(sender, instance, action, reverse, pk_set, **kwargs):
+    # Both the owner's results (shared_with) and the sharees' results change.
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+    if not reverse:
+        user_ids = set(instance.shared_with.values_list('pk', flat=True)) if action == 'pre_clear' else set(pk_set)
+        invalidate_searches(user_ids | {instance.user_id})
+        return
+    notes = instance.shared_notes.all() if action == 'pre_clear' else Note.objects.filter(pk__in=pk_set)
+    invalidate_searches({instance.pk, *notes.values_list('user_id', flat=True)})
+
+
+@receiver(m2m_changed, sender=Note.shared_with.through)
+def record_note_share(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('pre_clear', 'pre_remove'):
+        # Only the shares that exist: remove() reports every pk it was given.
+        shares = instance.shared_notes if reverse else instance.shared_with
+        if action == 'pre_remove':
+            shares = shares.filter(pk__in=pk_set)
+        pk_set = set(shares.values_list('pk', flat=True))
+        kind = NoteChange.UNSHARED
+    elif action == 'post_add':
+        kind = NoteChange.SHARED
+    else:
+        return
+    if reverse:
+        NoteChange.record(kind, pk_set, [instance.pk])
+    else:
+        NoteChange.record(kind, [instance.pk], pk_set)
@@ -0,0 +1,30 @@
+import base64
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+
+def encode_sync_token(moment):
+    """
+    Build the opaque token handed to clients after a sync. The token points
+    NOTES_SYNC_OVERLAP_SECONDS before `moment` so writes that committed
+    just after the sync query started are sent again on the next poll
+    rather than missed; clients must treat re-sent notes as upserts.
+    """
+    since = moment - timedelta(seconds=settings.NOTES_SYNC_OVERLAP_SECONDS)
+    return base64.urlsafe_b64encode(since.isoformat().encode()).decode()
+
+
+def decode_sync_token(token):
+    try:
+        moment = datetime.fromisoformat(base64.urlsafe_b64decode(token.encode()).decode())
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError('Invalid sync token.') from exc
+    if moment.tzinfo is None:
+        raise ValueError('Invalid sync token.')
+    return moment
+
+
+def sync_retention_cutoff(now):
+    """NoteChange rows older than this are pruned (see prune_note_changes)."""
+    return now - timedelta(days=settings.NOTES_SYNC_RETENTION_DAYS)
@@ -0,0 +1,24 @@
+"""Work that note endpoints and operators can hand to the job queue."""
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils.dateparse import parse_datetime
+
+from .jobs import task
+from .models import Note
+from .sharing import apply_sharing as _apply_sharing
+
+
+@task
+def apply_sharing(owner_id, note_ids, user_ids, share, requested_at=None):
+    # Skip notes deleted since the request was accepted.
+    note_ids = list(Note.objects.filter(pk__in=note_ids, user_id=owner_id).values_list('pk', flat=True))
+    _apply_sharing(owner_id, note_ids, user_ids, share, requested_at and parse_datetime(requested_at))
+    return {'notes': len(note_ids), 'users': len(user_ids)}
+
+
+@task
+def rebuild_search_vectors(all=False, batch_size=1000):
+    out = StringIO()
+    call_command('rebuild_search_vectors', all=all, batch_size=batch_size, stdout=out)
+    return {'output': out.getvalue().splitlines()[-1]}
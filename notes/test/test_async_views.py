@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import UserData
+from notes.cache import get_note_cache
+from notes.models import Note
+
+class AsyncNoteViewsTest(TestCase):
+    def setUp(self):
+        get_note_cache().clear()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        self.note = Note.objects.create(user=self.user, title='Garden plan', content='Plant tomatoes in spring.')
+        self.auth = self.auth_header(self.user)
+
+    def auth_header(self, user):
+        return {'AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse('async-note-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+        response = await self.async_client.get(reverse('async-note-list'), headers={'AUTHORIZATION': 'Bearer invalid'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_list_notes(self):
+        for i in range(3):
+            await Note.objects.acreate(user=self.user, title=f'Note {i}', content='content')
+        response = await self.async_client.get(reverse('async-note-list'), {'page_size': 2, 'fields': 'id,shared_with'}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['Notes'], [{'id': self.note.id, 'shared_with': []}, {'id': data['Notes'][1]['id'], 'shared_with': []}])
+        self.assertIsNotNone(data['next'])
+
+    async def test_retrieve_note(self):
+        url = reverse('async-note-detail', args=[self.note.id])
+        response = await self.async_client.get(url, {'fields': 'id,title'}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['note'], {'id': self.note.id, 'title': 'Garden plan'})
+
+        response = await self.async_client.get(url, headers=self.auth_header(self.other_user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = await self.async_client.get(reverse('async-note-detail', args=[self.note.id + 1000]), headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_search_notes(self):
+        response = await self.async_client.get(reverse('async-search-notes'), {'q': 'tomatoes'}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        notes = response.json()['notes']
+        self.assertEqual([note['id'] for note in notes], [self.note.id])
+        self.assertIn('<mark>tomatoes</mark>', notes[0]['snippet'])
+
+        response = await self.async_client.get(reverse('async-search-notes'), {'q': 'tomatos', 'fuzzy': 'true'}, headers=self.auth)
+        self.assertEqual([note['id'] for note in response.json()['notes']], [self.note.id])
+        response = await self.async_client.get(reverse('async-search-notes'), {'q': ' '}, headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_share_and_unshare_note(self):
+        url = reverse('async-share-note', args=[self.note.id])
+        response = await self.async_client.post(url, {'email': self.other_user.email}, content_type='application/json', headers=self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['detail'], 'Note shared successfully.')
+        self.assertTrue(await self.note.shared_with.filter(pk=self.other_user.pk).aexists())
+
+        other_auth = self.auth_header(self.other_user)
+        response = await self.async_client.get(reverse('async-note-detail', args=[self.note.id]), headers=other_auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = await self.async_client.post(url, {'email': self.user.email}, content_type='application/json', headers=other_auth)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.async_client.post(
+            reverse('async-unshare-note', args=[self.note.id]), {'email': self.other_user.email}, content_type='application/json', headers=self.auth,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await self.note.shared_with.filter(pk=self.other_user.pk).aexists())
@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import UserData
+from notes.models import Note
+
+class BatchViewSetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.note = Note.objects.create(user=self.user, title='Test Note', content='This is a test note.')
+        self.doomed = Note.objects.create(user=self.user, title='Doomed Note', content='Delete me.')
+        self.batch_url = reverse('batch-notes')
+
+    def test_batch(self):
+        operations = [
+            {'action': 'create', 'title': 'First', 'content': 'Searchable banana'},
+            {'action': 'create', 'title': 'Second', 'content': 'More content'},
+            {'action': 'update', 'id': self.note.id, 'title': 'Renamed'},
+            {'action': 'delete', 'id': self.doomed.id},
+        ]
+        response = self.client.post(self.batch_url, data={'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['created', 'created', 'updated', 'deleted'])
+
+        created = Note.objects.get(pk=response.data['results'][0]['id'])
+        self.assertEqual(created.user, self.user)
+        self.assertIn("'banana'", created.search_vector)
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, 'Renamed')
+        self.assertEqual(self.note.content, 'This is a test note.')
+        self.assertFalse(Note.objects.filter(pk=self.doomed.id).exists())
+
+    def test_batch_reports_errors_per_item(self):
+        other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        other_note = Note.objects.create(user=other_user, title='Not mine', content='Hands off.')
+        operations = [
+            {'action': 'create', 'title': 'Missing content'},
+            {'action': 'update', 'id': other_note.id, 'title': 'Hijacked'},
+            {'action': 'delete', 'id': 999999},
+            {'action': 'archive', 'id': self.note.id},
+            {'action': 'create', 'title': 'Valid', 'content': 'Valid content'},
+        ]
+        response = self.client.post(self.batch_url, data={'operations': operations}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['error', 'error', 'error', 'error', 'created'])
+        other_note.refresh_from_db()
+        self.assertEqual(other_note.title, 'Not mine')
+
+    def test_batch_create_query_count_is_flat(self):
+        def create_notes(count):
+            operations = [{'action': 'create', 'title': f'Note {i}', 'content': 'Bulk content'} for i in range(count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.batch_url, data={'operations': operations}, format='json')
+            self.assertEqual([result['status'] for result in response.data['results']], ['created'] * count)
+            return len(queries)
+        self.assertEqual(create_notes(2), create_notes(20))
+
+    def test_batch_invalid_body(self):
+        response = self.client.post(self.batch_url, data={'operations': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,153 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import UserData
+from notes.cache import get_note_cache
+from notes.models import Note
+
+class NoteCacheTest(TestCase):
+    def setUp(self):
+        get_note_cache().clear()
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        self.client.force_authenticate(user=self.user)
+        self.note = Note.objects.create(user=self.user, title='Test Note', content='This is a test note.')
+        self.note_url = reverse('note-detail', args=[self.note.id])
+
+    def test_retrieve_is_cached(self):
+        self.client.get(self.note_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.note_url, {'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['note'], {'id': self.note.id, 'title': 'Test Note'})
+
+    def test_update_invalidates(self):
+        self.client.get(self.note_url)
+        self.client.put(self.note_url, data={'title': 'Updated Title', 'content': 'Updated content.'})
+        response = self.client.get(self.note_url)
+        self.assertEqual(response.data['note']['title'], 'Updated Title')
+
+    def test_make_public_invalidates(self):
+        self.client.get(self.note_url)
+        self.client.post(reverse('make-public-note', args=[self.note.id]))
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(self.note_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_share_and_unshare_invalidate(self):
+        self.client.get(self.note_url)
+        self.client.post(reverse('share-note', args=[self.note.id]), data={'email': self.other_user.email})
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.client.get(self.note_url).status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('unshare-note', args=[self.note.id]), data={'email': self.other_user.email})
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.client.get(self.note_url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_padded_id_shares_the_cache_entry(self):
+        self.note.public = True
+        self.note.save()
+        self.client.force_authenticate(user=self.other_user)
+        padded_url = self.note_url.replace(f'/{self.note.id}/', f'/0{self.note.id}/')
+        self.assertEqual(self.client.get(padded_url).status_code, status.HTTP_200_OK)
+
+        self.note.public = False
+        self.note.save()
+        self.assertEqual(self.client.get(padded_url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(self.note_url).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_non_numeric_id(self):
+        response = self.client.get(reverse('note-detail', args=['abc']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(NOTE_CACHE_SHARED=False)
+    def test_unshared_cache_is_not_used(self):
+        self.client.get(self.note_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.note_url)
+        self.assertTrue(queries)
+        self.assertEqual(get_note_cache().get('note_cache:misses'), None)
+
+    def test_delete_invalidates(self):
+        self.client.get(self.note_url)
+        self.client.delete(self.note_url)
+        response = self.client.get(self.note_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_stats(self):
+        self.client.get(self.note_url)
+        self.client.get(self.note_url)
+        self.assertEqual(self.client.get(reverse('cache-stats')).status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = UserData.objects.create_superuser(name='admin', email='admin@example.com', password='adminpassword')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['notes'], {'hits': 1, 'misses': 1})
+
+class SearchCacheTest(TestCase):
+    def setUp(self):
+        get_note_cache().clear()
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        self.client.force_authenticate(user=self.user)
+        self.note = Note.objects.create(user=self.user, title='Garden plan', content='Plant tomatoes in spring.')
+        self.search_url = reverse('search-notes')
+
+    def search(self, **params):
+        response = self.client.get(self.search_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [note['id'] for note in response.data['notes']]
+
+    def test_repeated_search_is_cached(self):
+        self.search(q='tomatoes')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.search_url, {'q': '  tomatoes '})
+        self.assertEqual([note['id'] for note in response.data['notes']], [self.note.id])
+        self.assertIn('<mark>', response.data['notes'][0]['snippet'])
+
+    def test_write_invalidates(self):
+        self.assertEqual(self.search(q='tomatoes'), [self.note.id])
+        self.client.put(reverse('note-detail', args=[self.note.id]), data={'title': 'Garden plan', 'content': 'Plant beans.'})
+        self.assertEqual(self.search(q='tomatoes'), [])
+        new_note = Note.objects.create(user=self.user, title='Tomatoes', content='Water daily.')
+        self.assertEqual(self.search(q='tomatoes'), [new_note.id])
+
+    def test_batch_invalidates(self):
+        self.assertEqual(self.search(q='tomatoes'), [self.note.id])
+        self.client.post(reverse('batch-notes'), data={'operations': [{'action': 'delete', 'id': self.note.id}]}, format='json')
+        self.assertEqual(self.search(q='tomatoes'), [])
+
+    def test_share_invalidates_sharee_and_owner(self):
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.search(q='tomatoes', scope='shared'), [])
+        self.client.force_authenticate(user=self.user)
+        self.search(q='tomatoes', fields='id,shared_with')
+
+        self.client.post(reverse('share-note', args=[self.note.id]), data={'email': self.other_user.email})
+        response = self.client.get(self.search_url, {'q': 'tomatoes', 'fields': 'id,shared_with'})
+        self.assertEqual(response.data['notes'][0]['shared_with'], [self.other_user.id])
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.search(q='tomatoes', scope='shared'), [self.note.id])
+
+    def test_public_scope_invalidated_by_other_users(self):
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.search(q='tomatoes', scope='public'), [])
+        self.client.force_authenticate(user=self.user)
+        self.client.post(reverse('make-public-note', args=[self.note.id]))
+        self.client.force_authenticate(user=self.other_user)
+        self.assertEqual(self.search(q='tomatoes', scope='public'), [self.note.id])
+
+    def test_search_cache_stats(self):
+        self.search(q='tomatoes')
+        self.search(q='tomatoes')
+        admin = UserData.objects.create_superuser(name='admin', email='admin@example.com', password='adminpassword')
+        self.client.force_authenticate(user=admin)
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.data['search'], {'hits': 1, 'misses': 1})
@@ -0,0 +1,59 @@
+import gzip
+import json
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import UserData
+from notes.models import Note
+
+# Smaller than the number of notes, so the export spans several chunks.
+@override_settings(NOTES_EXPORT_CHUNK_SIZE=2)
+class ExportViewSetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.notes = [Note.objects.create(user=self.user, title=f'Note {i}', content=f'Content {i}') for i in range(5)]
+        self.notes[0].shared_with.add(self.other_user)
+        Note.objects.create(user=self.other_user, title='Other', content='Not exported')
+        self.url = reverse('export-notes')
+
+    def content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_export_ndjson(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        notes = [json.loads(line) for line in self.content(response).decode().splitlines()]
+        self.assertEqual([note['id'] for note in notes], [note.id for note in self.notes])
+        self.assertEqual(notes[0]['shared_with'], [self.other_user.id])
+        self.assertNotIn('search_vector', notes[0])
+
+    def test_export_json_array(self):
+        response = self.client.get(self.url, {'output': 'json', 'fields': 'id,title'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        notes = json.loads(self.content(response))
+        self.assertEqual(notes, [{'id': note.id, 'title': note.title} for note in self.notes])
+
+    def test_export_empty_json_array(self):
+        Note.objects.filter(user=self.user).delete()
+        response = self.client.get(self.url, {'output': 'json'})
+        self.assertEqual(json.loads(self.content(response)), [])
+
+    def test_export_gzip(self):
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        lines = gzip.decompress(self.content(response)).decode().splitlines()
+        self.assertEqual(len(lines), len(self.notes))
+
+    def test_invalid_output(self):
+        response = self.client.get(self.url, {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_requires_authentication(self):
+        response = APIClient().get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
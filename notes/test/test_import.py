@@ -0,0 +1,103 @@
+import io
+import json
+import tempfile
+import zipfile
+from pathlib import Path
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import UserData
+from notes.cache import get_note_cache
+from notes.models import Note
+
+def ndjson(*records):
+    return ''.join(f'{json.dumps(record)}\n' for record in records).encode()
+
+def markdown_zip(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, text in files.items():
+            archive.writestr(name, text)
+    return buffer.getvalue()
+
+# Smaller than the uploads, so imports span several chunks.
+@override_settings(NOTES_IMPORT_CHUNK_SIZE=2)
+class ImportViewSetTest(TestCase):
+    def setUp(self):
+        get_note_cache().clear()
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('import-notes')
+
+    def upload(self, name, content):
+        response = self.client.post(self.url, {'file': SimpleUploadedFile(name, content)}, format='multipart')
+        if response.status_code != status.HTTP_200_OK:
+            return response, None
+        return response, [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_import_ndjson(self):
+        content = ndjson(
+            {'title': 'First', 'content': 'Imported note'},
+            {'title': 'Second', 'content': 'Another note'},
+            {'title': '', 'content': 'No title'},
+        ) + b'not json\n'
+        response, progress = self.upload('notes.ndjson', content)
+        self.assertEqual(len(progress), 3)
+        self.assertEqual(progress[0], {'imported': 2, 'failed': 0, 'errors': []})
+        self.assertEqual([error['position'] for error in progress[1]['errors']], [3, 4])
+        self.assertEqual(progress[-1], {'detail': 'Import finished', 'imported': 2, 'failed': 2})
+        notes = Note.objects.filter(user=self.user).order_by('id')
+        self.assertEqual([note.title for note in notes], ['First', 'Second'])
+        self.assertIsNotNone(notes[0].search_vector)
+
+    def test_import_markdown_zip(self):
+        content = markdown_zip({
+            'notebook/groceries.md': '# Groceries\n\nMilk and eggs',
+            'journal.markdown': 'No heading here',
+            'image.png': 'ignored',
+        })
+        response, progress = self.upload('export.zip', content)
+        self.assertEqual(progress[-1]['imported'], 2)
+        notes = {note.title: note.content for note in Note.objects.filter(user=self.user)}
+        self.assertEqual(notes, {'Groceries': 'Milk and eggs', 'journal': 'No heading here'})
+
+    @override_settings(NOTES_IMPORT_MAX_NOTE_SIZE=10)
+    def test_oversized_markdown_file_is_rejected(self):
+        response, progress = self.upload('export.zip', markdown_zip({'big.md': 'x' * 11}))
+        self.assertEqual(progress[-1], {'detail': 'Import finished', 'imported': 0, 'failed': 1})
+
+    def test_imported_notes_appear_in_search(self):
+        self.client.get(reverse('search-notes'), {'q': 'imported'})
+        self.upload('notes.jsonl', ndjson({'title': 'Imported', 'content': 'Imported note'}))
+        response = self.client.get(reverse('search-notes'), {'q': 'imported'})
+        self.assertEqual(len(response.data['notes']), 1)
+
+    def test_invalid_uploads(self):
+        self.assertEqual(self.upload('notes.txt', b'')[0].status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.upload('notes.zip', b'not a zip')[0].status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    @override_settings(NOTES_IMPORT_MAX_NOTE_SIZE=40)
+    def test_oversized_ndjson_line_is_rejected(self):
+        content = ndjson({'title': 'Big', 'content': 'x' * 100}, {'title': 'Small', 'content': 'Fits'})
+        response, progress = self.upload('notes.ndjson', content)
+        self.assertEqual(progress[0]['errors'], [{'position': 1, 'errors': 'Line is longer than 40 bytes.'}])
+        self.assertEqual(progress[-1], {'detail': 'Import finished', 'imported': 1, 'failed': 1})
+        self.assertEqual(list(Note.objects.filter(user=self.user).values_list('title', flat=True)), ['Small'])
+
+
+class ImportNotesCommandTest(TestCase):
+    def test_import_notes(self):
+        user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.ndjson'
+            path.write_bytes(ndjson({'title': 'First', 'content': 'Imported note'}, {'title': 'Second'}))
+            out, err = io.StringIO(), io.StringIO()
+            call_command('import_notes', str(path), email=user.email, stdout=out, stderr=err)
+        self.assertIn('Imported 1 notes, 1 failed.', out.getvalue())
+        self.assertIn('2:', err.getvalue())
+        self.assertEqual(Note.objects.filter(user=user).count(), 1)
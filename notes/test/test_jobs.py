@@ -0,0 +1,155 @@
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.conf import settings
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import UserData
+from notes.jobs import claim_job, enqueue, requeue_stale_jobs, run_job, work
+from notes.models import Job, Note
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+
+    def test_claim_takes_ready_jobs_in_order(self):
+        later = enqueue('rebuild_search_vectors')
+        Job.objects.filter(pk=later.pk).update(run_after=timezone.now() + timedelta(minutes=1))
+        first = enqueue('rebuild_search_vectors')
+        second = enqueue('rebuild_search_vectors')
+        self.assertEqual(claim_job().pk, first.pk)
+        job = claim_job()
+        self.assertEqual((job.pk, job.status, job.attempts), (second.pk, Job.RUNNING, 1))
+        self.assertIsNone(claim_job())
+
+    def test_unknown_job(self):
+        with self.assertRaises(ValueError):
+            enqueue('missing')
+
+    @override_settings(JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=60)
+    def test_failed_job_is_retried_then_failed(self):
+        enqueue('rebuild_search_vectors')
+        with mock.patch('notes.tasks.call_command', side_effect=RuntimeError('boom')):
+            job = run_job(claim_job())
+            self.assertEqual(job.status, Job.PENDING)
+            self.assertIn('boom', job.error)
+            self.assertGreater(job.run_after, timezone.now())
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+            job = run_job(claim_job())
+        self.assertEqual(job.status, Job.FAILED)
+
+    @override_settings(JOB_TIMEOUT=60)
+    def test_stale_running_job_is_requeued(self):
+        job = enqueue('rebuild_search_vectors')
+        claim_job()
+        Job.objects.filter(pk=job.pk).update(date_started=timezone.now() - timedelta(minutes=5))
+        requeue_stale_jobs()
+        self.assertEqual(claim_job().pk, job.pk)
+
+    def test_unserializable_result_fails_job(self):
+        enqueue('rebuild_search_vectors')
+        with mock.patch.dict('notes.jobs._tasks', {'rebuild_search_vectors': lambda **kwargs: {'value': object()}}):
+            job = run_job(claim_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('TypeError', job.error)
+
+    def test_worker_survives_errors(self):
+        stop = threading.Event()
+        calls = []
+        def claim():
+            calls.append(None)
+            if len(calls) == 1:
+                raise OperationalError('server closed the connection unexpectedly')
+            stop.set()
+        with mock.patch('notes.jobs.claim_job', claim), mock.patch('notes.jobs.close_old_connections'), \
+                mock.patch('notes.jobs.connection'), override_settings(JOB_POLL_INTERVAL=0):
+            with self.assertLogs('notes.jobs', 'ERROR'):
+                work(stop)
+        self.assertEqual(len(calls), 2)
+
+class DeferredShareTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.note = Note.objects.create(user=self.user, title='Test Note', content='This is a test note.')
+
+    def test_deferred_share(self):
+        url = reverse('bulk-share-notes') + '?defer=true'
+        response = self.client.post(url, {'note_ids': [self.note.id], 'emails': ['otheruser@example.com']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(self.note.shared_with.exists())
+
+        job = run_job(claim_job())
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(list(self.note.shared_with.all()), [self.other_user])
+
+        response = self.client.get(reverse('job-detail', args=[response.data['job']]))
+        self.assertEqual(response.data['job']['status'], Job.DONE)
+        self.assertEqual(response.data['job']['result'], {'notes': 1, 'users': 1})
+
+    def test_deferred_share_does_not_undo_later_unshare(self):
+        data = {'note_ids': [self.note.id], 'emails': ['otheruser@example.com']}
+        self.client.post(reverse('bulk-share-notes') + '?defer=true', data, format='json')
+        response = self.client.post(reverse('bulk-unshare-notes'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(run_job(claim_job()).status, Job.DONE)
+        self.assertFalse(self.note.shared_with.exists())
+
+    def test_deferred_changes_apply_in_request_order(self):
+        data = {'note_ids': [self.note.id], 'emails': ['otheruser@example.com']}
+        self.client.post(reverse('bulk-share-notes') + '?defer=true', data, format='json')
+        self.client.post(reverse('bulk-unshare-notes') + '?defer=true', data, format='json')
+        share, unshare = claim_job(), claim_job()
+        run_job(unshare)
+        run_job(share)
+        self.assertFalse(self.note.shared_with.exists())
+
+    def test_other_users_jobs_are_hidden(self):
+        job = enqueue('rebuild_search_vectors', user=self.other_user)
+        response = self.client.get(reverse('job-detail', args=[job.pk]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+# Worker threads use their own connections, so the jobs must be committed.
+class RunJobsCommandTest(TransactionTestCase):
+    def test_threads_share_the_queue(self):
+        jobs = [enqueue('rebuild_search_vectors') for _ in range(6)]
+        call_command('run_jobs', threads=3, burst=True, stdout=StringIO())
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.DONE})
+        self.assertEqual(set(Job.objects.values_list('attempts', flat=True)), {1})
+        self.assertEqual(len(jobs), Job.objects.count())
+
+    def test_processes_stop_on_sigterm(self):
+        job = enqueue('rebuild_search_vectors')
+        database = connection.settings_dict
+        env = {
+            **os.environ,
+            'POSTGRES_DATABASE': database['NAME'], 'POSTGRES_HOST': database['HOST'] or '', 'POSTGRES_PORT': str(database['PORT'] or ''),
+            'POSTGRES_USER': database['USER'] or '', 'POSTGRES_PASSWORD': database['PASSWORD'] or '',
+        }
+        worker = subprocess.Popen(
+            [sys.executable, 'manage.py', 'run_jobs', '--processes', '2'],
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, start_new_session=True,
+        )
+        # Whatever happens, leave no workers behind.
+        self.addCleanup(lambda: subprocess.run(['pkill', '-KILL', '-s', str(worker.pid)]))
+        deadline = time.monotonic() + 30
+        while Job.objects.get(pk=job.pk).status != Job.DONE and time.monotonic() < deadline:
+            time.sleep(0.1)
+        # The parent forwards the signal to its children and waits for them.
+        worker.send_signal(signal.SIGTERM)
+        self.assertEqual(worker.wait(timeout=30), 0)
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.DONE)
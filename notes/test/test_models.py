@@ -1,4 +1,6 @@
+from django.core.management import call_command
 from django.test import TestCase
+from io import StringIO
 from users.models import UserData
 from notes.models import Note
 from django.contrib.postgres.search import SearchVectorField, SearchVector
@@ -29,4 +31,59 @@ class NoteModelTest(TestCase):
         shared_user = UserData.objects.create(name='shareduser', email='shareduser@example.com', password='sharedpassword')
         note = Note.objects.create(**self.note_data)
         note.shared_with.add(shared_user)
-        self.assertIn(note, shared_user.shared_notes.all())
\ No newline at end of file
+        self.assertIn(note, shared_user.shared_notes.all())
+
+    def test_search_vector_maintained_on_write(self):
+        note = Note.objects.create(**self.note_data)
+        note.refresh_from_db()
+        self.assertIn("'test'", note.search_vector)
+
+        note.title = 'Renamed'
+        note.save()
+        note.refresh_from_db()
+        self.assertIn("'renam'", note.search_vector)
+
+    def test_flag_toggle_keeps_search_vector(self):
+        note = Note.objects.create(**self.note_data)
+        note.refresh_from_db()
+        vector = note.search_vector
+        note.public = True
+        note.save(update_fields=['public', 'date_modified'])
+        note.refresh_from_db()
+        self.assertEqual(note.search_vector, vector)
+
+    def test_rebuild_search_vectors_command(self):
+        note = Note.objects.create(**self.note_data)
+        out = StringIO()
+        call_command('rebuild_search_vectors', all=True, batch_size=1, stdout=out)
+        note.refresh_from_db()
+        self.assertIn("'test'", note.search_vector)
+        self.assertIn('Rebuilt 1 search vectors.', out.getvalue())
+
+    def test_with_access(self):
+        other_user = UserData.objects.create(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        note = Note.objects.create(**self.note_data)
+        note.shared_with.add(other_user)
+        owned = Note.objects.with_access(self.user).get(pk=note.pk)
+        self.assertTrue(owned.is_owner)
+        self.assertFalse(owned.is_shared)
+        shared = Note.objects.with_access(other_user).get(pk=note.pk)
+        self.assertFalse(shared.is_owner)
+        self.assertTrue(shared.is_shared)
+
+    def test_readers_follow_sharing(self):
+        other_user = UserData.objects.create(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        note = Note.objects.create(**self.note_data)
+        note.refresh_from_db()
+        self.assertEqual(note.readers, [self.user.pk])
+
+        note.shared_with.add(other_user)
+        note.title = 'Saved with stale readers'
+        note.save()
+        note.refresh_from_db()
+        self.assertEqual(sorted(note.readers), sorted([self.user.pk, other_user.pk]))
+
+        note.shared_with.remove(other_user)
+        note.refresh_from_db()
+        self.assertEqual(note.readers, [self.user.pk])
+        self.assertEqual(list(Note.objects.accessible_to(other_user)), [])
@@ -3,6 +3,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from users.models import UserData
+from notes.cache import get_note_cache
 from notes.models import Note
 
 class NoteViewSetTest(TestCase):
@@ -23,6 +24,50 @@ class NoteViewSetTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual('Notes Fetched Successfully', response.data['detail'])
 
+    def test_list_notes_paginated(self):
+        for i in range(4):
+            Note.objects.create(user=self.user, title=f'Note {i}', content='content')
+        response = self.client.get(reverse('note-list'), {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['Notes']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        seen = [note['id'] for note in response.data['Notes']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(note['id'] for note in response.data['Notes'])
+            next_url = response.data['next']
+        expected = list(Note.objects.filter(user=self.user).order_by('date_modified', 'id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_list_notes_query_count_is_flat(self):
+        sharee = UserData.objects.create_user(name='sharee', email='sharee@example.com', password='shareepassword')
+        self.note.shared_with.add(sharee)
+        with self.assertNumQueries(2):
+            self.client.get(reverse('note-list'))
+        for i in range(5):
+            note = Note.objects.create(user=self.user, title=f'Note {i}', content='content')
+            note.shared_with.add(sharee)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('note-list'))
+        self.assertEqual(len(response.data['Notes']), 6)
+        self.assertEqual(response.data['Notes'][0]['shared_with'], [sharee.id])
+
+    def test_list_notes_hides_search_vector(self):
+        response = self.client.get(reverse('note-list'))
+        self.assertNotIn('search_vector', response.data['Notes'][0])
+
+    def test_list_notes_sparse_fields(self):
+        response = self.client.get(reverse('note-list'), {'fields': 'id,title,date_modified'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['Notes'][0]), {'id', 'title', 'date_modified'})
+
+    def test_retrieve_note_sparse_fields(self):
+        response = self.client.get(self.note_url, {'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['note'], {'id': self.note.id, 'title': self.note.title})
+
     def test_create_note(self):
         response = self.client.post(reverse('note-list'), data=self.note_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -33,6 +78,30 @@ class NoteViewSetTest(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual('Note retrieved successfully', response.data['detail'])
 
+    def test_retrieve_note_permissions(self):
+        other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        self.client.force_authenticate(user=other_user)
+        response = self.client.get(self.note_url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.note.shared_with.add(other_user)
+        response = self.client.get(self.note_url, {'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.note.shared_with.remove(other_user)
+        Note.objects.filter(pk=self.note.pk).update(public=True)
+        response = self.client.get(self.note_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_retrieve_note_single_query(self):
+        other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='testpassword')
+        self.note.shared_with.add(other_user)
+        get_note_cache().clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(self.note_url, {'fields': 'id,title,shared_with'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['note']['shared_with'], [other_user.id])
+
     def test_update_note(self):
         updated_data = {
             'title': 'Updated Test Note',
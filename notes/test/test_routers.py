@@ -0,0 +1,67 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.routers import ReplicaRouter, is_pinned, replica_reads, use_primary
+from users.models import UserData
+from notes.cache import get_note_cache
+from notes.models import Note
+
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    @override_settings(DATABASE_REPLICAS=['replica_0', 'replica_1'])
+    def test_reads_use_replicas_only_when_enabled(self):
+        self.assertEqual(self.router.db_for_read(Note), 'default')
+        with replica_reads():
+            self.assertIn(self.router.db_for_read(Note), ['replica_0', 'replica_1'])
+            self.assertEqual(self.router.db_for_write(Note), 'default')
+            with use_primary():
+                self.assertEqual(self.router.db_for_read(Note), 'default')
+        self.assertEqual(self.router.db_for_read(Note), 'default')
+
+    def test_without_replicas_reads_use_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Note), 'default')
+
+    def test_migrations_only_run_on_primary(self):
+        self.assertTrue(self.router.allow_migrate('default', 'notes'))
+        self.assertFalse(self.router.allow_migrate('replica_0', 'notes'))
+
+# The replica alias is the primary itself, so queries still run in the test
+# transaction; the test only checks which reads were routed to a replica.
+@override_settings(DATABASE_REPLICAS=['default'])
+class ReadYourWritesTest(TestCase):
+    def setUp(self):
+        get_note_cache().clear()
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.note = Note.objects.create(user=self.user, title='Test Note', content='This is a test note.')
+
+    def replica_reads_during(self, method, url, **kwargs):
+        with mock.patch('core.routers.random.choice', side_effect=lambda replicas: replicas[0]) as choice:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, choice.call_count
+
+    def test_list_reads_from_replica(self):
+        response, replica_reads = self.replica_reads_during('get', reverse('note-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(replica_reads, 0)
+
+    def test_write_pins_user_to_primary(self):
+        response, replica_reads = self.replica_reads_during('post', reverse('note-list'), data={'title': 'New', 'content': 'Note'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(replica_reads, 0)
+        self.assertTrue(is_pinned(self.user.pk))
+
+        response, replica_reads = self.replica_reads_during('get', reverse('note-list'))
+        self.assertEqual(len(response.data['Notes']), 2)
+        self.assertEqual(replica_reads, 0)
+
+    def test_cache_fills_read_from_primary(self):
+        response, replica_reads = self.replica_reads_during('get', reverse('note-detail', args=[self.note.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(replica_reads, 0)
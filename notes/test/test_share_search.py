@@ -3,6 +3,7 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 from users.models import UserData
+from notes.cache import get_note_cache
 from notes.models import Note
 
 class ShareViewSetTest(TestCase):
@@ -38,6 +39,46 @@ class ShareViewSetTest(TestCase):
         response = self.client.post(self.share_url, data=data)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_share_note_many_emails(self):
+        first = UserData.objects.create_user(name='first', email='first@example.com', password='firstpassword')
+        second = UserData.objects.create_user(name='second', email='second@example.com', password='secondpassword')
+        data = {'emails': [first.email, second.email, 'nobody@example.com']}
+        response = self.client.post(self.share_url, data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unknown_emails'], ['nobody@example.com'])
+        self.assertEqual(set(self.note.shared_with.all()), {first, second})
+
+    def test_share_note_malformed_emails(self):
+        for emails in ([['x']], 5, [{'a': 1}]):
+            response = self.client.post(self.share_url, data={'emails': emails}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_share_many_notes(self):
+        second_note = Note.objects.create(user=self.user, title='Second Note', content='More content.')
+        recipients = [
+            UserData.objects.create_user(name=f'user{i}', email=f'user{i}@example.com', password='userpassword')
+            for i in range(3)
+        ]
+        data = {'note_ids': [self.note.id, second_note.id], 'emails': [user.email for user in recipients]}
+        # The notes are locked so deferred sharing jobs see this change (see notes/sharing.py).
+        with self.assertNumQueries(7):
+            response = self.client.post(reverse('bulk-share-notes'), data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Notes shared successfully', str(response.data))
+        self.assertEqual(Note.shared_with.through.objects.filter(note__in=[self.note, second_note]).count(), 6)
+
+        response = self.client.post(reverse('bulk-unshare-notes'), data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Note.shared_with.through.objects.filter(note__in=[self.note, second_note]).exists())
+
+    def test_bulk_share_permission_denied(self):
+        other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        other_note = Note.objects.create(user=other_user, title='Not mine', content='Hands off.')
+        data = {'note_ids': [self.note.id, other_note.id], 'emails': [other_user.email]}
+        response = self.client.post(reverse('bulk-share-notes'), data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(self.note.shared_with.exists())
+
 class UnShareViewSetTest(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -123,6 +164,7 @@ class MakePrivateViewSetTest(TestCase):
 
 class SearchViewSetTest(TestCase):
     def setUp(self):
+        get_note_cache().clear()
         self.client = APIClient()
         self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
         self.client.force_authenticate(user=self.user)
@@ -143,3 +185,108 @@ class SearchViewSetTest(TestCase):
         response = self.client.get(self.search_url)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn('Invalid search query', str(response.data))
+
+    def test_search_notes_sparse_fields(self):
+        response = self.client.get(self.search_url, {'q': 'test', 'fields': 'id,title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['notes'], [{'id': self.note.id, 'title': self.note.title}])
+
+    def test_search_notes_query_count_is_flat(self):
+        sharee = UserData.objects.create_user(name='sharee', email='sharee@example.com', password='shareepassword')
+        for i in range(5):
+            note = Note.objects.create(user=self.user, title=f'Test Note {i}', content='content')
+            note.shared_with.add(sharee)
+        with self.assertNumQueries(3):
+            response = self.client.get(self.search_url, {'q': 'test'})
+        self.assertEqual(len(response.data['notes']), 6)
+
+    def test_search_notes_paginated(self):
+        for i in range(4):
+            Note.objects.create(user=self.user, title=f'Test Note {i}', content='content')
+        response = self.client.get(self.search_url, {'q': 'test', 'limit': 2})
+        self.assertEqual(len(response.data['notes']), 2)
+        self.assertIsNotNone(response.data['next'])
+        self.assertIsNone(response.data['previous'])
+
+        seen = [note['id'] for note in response.data['notes']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(note['id'] for note in response.data['notes'])
+            next_url = response.data['next']
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(len(set(seen)), 5)
+
+    def test_search_websearch_syntax(self):
+        meeting = Note.objects.create(user=self.user, title='Meeting minutes', content='Quarterly planning with the team')
+        Note.objects.create(user=self.user, title='Groceries', content='planning dinner with friends')
+        cases = {
+            'meet*': [meeting.id],
+            '"quarterly planning"': [meeting.id],
+            'planning -dinner': [meeting.id],
+        }
+        for query, expected in cases.items():
+            response = self.client.get(self.search_url, {'q': query, 'fields': 'id'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([note['id'] for note in response.data['notes']], expected, query)
+
+    def test_search_min_rank(self):
+        response = self.client.get(self.search_url, {'q': 'test', 'min_rank': 100})
+        self.assertEqual(response.data['notes'], [])
+
+    def test_search_invalid_type(self):
+        response = self.client.get(self.search_url, {'q': 'test', 'type': 'raw'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_scopes(self):
+        other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        shared = Note.objects.create(user=other_user, title='Test Shared', content='Shared with me')
+        shared.shared_with.add(self.user)
+        public = Note.objects.create(user=other_user, title='Test Public', content='Everyone', public=True)
+        Note.objects.create(user=other_user, title='Test Private', content='Not for me')
+        cases = {
+            'own': {self.note.id},
+            'shared': {shared.id},
+            'public': {public.id},
+            'all': {self.note.id, shared.id, public.id},
+        }
+        for scope, expected in cases.items():
+            response = self.client.get(self.search_url, {'q': 'test', 'scope': scope, 'fields': 'id'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual({note['id'] for note in response.data['notes']}, expected, scope)
+
+    def test_search_invalid_scope(self):
+        response = self.client.get(self.search_url, {'q': 'test', 'scope': 'everything'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_returns_snippets(self):
+        long_note = Note.objects.create(user=self.user, title='Journal', content=' '.join(['filler'] * 200 + ['needle'] + ['filler'] * 200))
+        response = self.client.get(self.search_url, {'q': 'needle'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        result = response.data['notes'][0]
+        self.assertEqual(result['id'], long_note.id)
+        self.assertNotIn('content', result)
+        self.assertIn('<mark>needle</mark>', result['snippet'])
+        self.assertLess(len(result['snippet']), 500)
+
+        response = self.client.get(self.search_url, {'q': 'needle', 'fields': 'id,content'})
+        self.assertEqual(response.data['notes'][0]['content'], long_note.content)
+
+    def test_search_snippets_escape_note_html(self):
+        other_user = UserData.objects.create_user(name='otheruser2', email='otheruser2@example.com', password='testpassword')
+        Note.objects.create(user=other_user, title='Markup', content='hello <img src=x onerror=alert(1)> world & "friends"', public=True)
+        response = self.client.get(self.search_url, {'q': 'hello', 'scope': 'public'})
+        snippet = response.data['notes'][0]['snippet']
+        self.assertTrue(snippet.startswith('<mark>hello</mark> &lt;img src=x onerror=alert(1)&gt; world &amp; &quot;friends'))
+        self.assertNotIn('<img', snippet)
+
+    def test_search_fuzzy(self):
+        meeting = Note.objects.create(user=self.user, title='Quarterly meeting', content='Budget discussion with finance')
+        response = self.client.get(self.search_url, {'q': 'quartrly', 'fields': 'id'})
+        self.assertEqual(response.data['notes'], [])
+
+        response = self.client.get(self.search_url, {'q': 'quartrly', 'fuzzy': 'true', 'fields': 'id'})
+        self.assertEqual([note['id'] for note in response.data['notes']], [meeting.id])
+
+        response = self.client.get(self.search_url, {'q': 'finanse', 'fuzzy': 'true', 'fields': 'id'})
+        self.assertEqual([note['id'] for note in response.data['notes']], [meeting.id])
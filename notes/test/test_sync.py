@@ -0,0 +1,110 @@
+from datetime import timedelta
+from io import StringIO
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.models import UserData
+from notes.models import Note, NoteChange
+from notes.sharing import apply_sharing
+from notes.sync import encode_sync_token
+
+class SyncViewSetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserData.objects.create_user(name='testuser', email='testuser@example.com', password='testpassword')
+        self.other_user = UserData.objects.create_user(name='otheruser', email='otheruser@example.com', password='otherpassword')
+        self.client.force_authenticate(user=self.user)
+        self.old_note = Note.objects.create(user=self.user, title='Old Note', content='Unchanged.')
+        self.sync_url = reverse('sync-notes')
+
+        # Everything created so far happened well before the token.
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Note.objects.update(date_modified=an_hour_ago)
+        NoteChange.objects.update(date=an_hour_ago)
+        self.token = encode_sync_token(timezone.now() - timedelta(minutes=30))
+
+    def sync(self):
+        response = self.client.get(self.sync_url, {'since': self.token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    def test_full_sync(self):
+        response = self.client.get(self.sync_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([note['id'] for note in response.data['notes']], [self.old_note.id])
+        self.assertIn('token', response.data)
+
+    def test_full_sync_is_paged(self):
+        new_note = Note.objects.create(user=self.user, title='New Note', content='Fresh.')
+        response = self.client.get(self.sync_url, {'page_size': 1})
+        self.assertEqual([note['id'] for note in response.data['notes']], [self.old_note.id])
+        self.assertIsNone(response.data['token'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual([note['id'] for note in response.data['notes']], [new_note.id])
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['token'])
+
+    def test_nothing_changed(self):
+        response = self.sync()
+        self.assertEqual(response.data['notes'], [])
+        self.assertEqual(response.data['deleted'], [])
+
+    def test_modified_and_shared_notes(self):
+        new_note = Note.objects.create(user=self.user, title='New Note', content='Fresh.')
+        shared_note = Note.objects.create(user=self.other_user, title='Shared Note', content='For you.')
+        Note.objects.filter(pk=shared_note.pk).update(date_modified=timezone.now() - timedelta(hours=1))
+        shared_note.shared_with.add(self.user)
+        response = self.sync()
+        self.assertEqual({note['id'] for note in response.data['notes']}, {new_note.id, shared_note.id})
+
+    def test_tombstones(self):
+        shared_note = Note.objects.create(user=self.other_user, title='Shared Note', content='For you.')
+        shared_note.shared_with.add(self.user)
+        shared_note.shared_with.remove(self.user)
+        deleted_id = self.old_note.id
+        self.old_note.delete()
+        response = self.sync()
+        self.assertEqual(response.data['notes'], [])
+        self.assertEqual(response.data['deleted'], sorted([deleted_id, shared_note.id]))
+
+    def test_unshare_from_non_recipient_is_not_reported(self):
+        private_note = Note.objects.create(user=self.other_user, title='Private Note', content='Not yours.')
+        apply_sharing(self.other_user.pk, [private_note.pk], [self.user.pk], share=False)
+        private_note.shared_with.remove(self.user)
+        self.assertFalse(NoteChange.objects.filter(user=self.user, kind=NoteChange.UNSHARED).exists())
+        self.assertEqual(self.sync().data['deleted'], [])
+
+    def test_bulk_delete_records_tombstones_in_bulk(self):
+        def delete_shared_notes(count):
+            notes = [Note.objects.create(user=self.user, title='Shared', content='Shared.') for _ in range(count)]
+            Note.shared_with.through.objects.bulk_create([Note.shared_with.through(note=note, userdata=self.other_user) for note in notes])
+            with CaptureQueriesContext(connection) as queries:
+                Note.objects.filter(pk__in=[note.pk for note in notes]).delete()
+            self.assertEqual(NoteChange.objects.filter(kind=NoteChange.DELETED, note_id__in=[note.pk for note in notes]).count(), count * 2)
+            return len(queries)
+
+        self.assertEqual(delete_shared_notes(2), delete_shared_notes(6))
+
+    def test_expired_token(self):
+        token = encode_sync_token(timezone.now() - timedelta(days=settings.NOTES_SYNC_RETENTION_DAYS + 1))
+        response = self.client.get(self.sync_url, {'since': token})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_prune_note_changes(self):
+        shared_note = Note.objects.create(user=self.other_user, title='Shared Note', content='For you.')
+        shared_note.shared_with.add(self.user)
+        shared_note.shared_with.remove(self.user)
+        NoteChange.objects.filter(kind=NoteChange.SHARED).update(date=timezone.now() - timedelta(days=settings.NOTES_SYNC_RETENTION_DAYS + 1))
+        call_command('prune_note_changes', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(NoteChange.objects.values_list('kind', flat=True)), [NoteChange.UNSHARED])
+
+    def test_invalid_token(self):
+        response = self.client.get(self.sync_url, {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
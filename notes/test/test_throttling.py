@@ -0,0 +1,42 @@
+from unittest import skipUnless
+from django.test import SimpleTestCase
+from core.throttling import LocalThrottleStore, RedisThrottleStore
+
+try:
+    import fakeredis
+except ImportError:
+    fakeredis = None
+
+class ThrottleStoreTestMixin:
+    def test_allows_up_to_limit(self):
+        results = [self.store.hit('user_1', 3, 60, 120.0)[0] for _ in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+
+    def test_reports_wait(self):
+        for _ in range(2):
+            self.store.hit('user_1', 2, 60, 150.0)
+        allowed, wait = self.store.hit('user_1', 2, 60, 150.0)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 30.0)
+
+    def test_previous_window_decays(self):
+        for _ in range(4):
+            self.store.hit('user_1', 4, 60, 100.0)
+        # Halfway through the next window, half of the previous hits still count.
+        self.assertTrue(self.store.hit('user_1', 4, 60, 150.0)[0])
+        self.assertTrue(self.store.hit('user_1', 4, 60, 150.0)[0])
+        self.assertFalse(self.store.hit('user_1', 4, 60, 150.0)[0])
+
+    def test_keys_are_independent(self):
+        self.store.hit('user_1', 1, 60, 120.0)
+        self.assertFalse(self.store.hit('user_1', 1, 60, 120.0)[0])
+        self.assertTrue(self.store.hit('user_2', 1, 60, 120.0)[0])
+
+class LocalThrottleStoreTest(ThrottleStoreTestMixin, SimpleTestCase):
+    def setUp(self):
+        self.store = LocalThrottleStore()
+
+@skipUnless(fakeredis, 'fakeredis is not installed')
+class RedisThrottleStoreTest(ThrottleStoreTestMixin, SimpleTestCase):
+    def setUp(self):
+        self.store = RedisThrottleStore(client=fakeredis.FakeRedis())
@@ -1,16 +1,31 @@
 from rest_framework import routers
-from .views import NoteViewSet, ShareViewSet, UnShareViewSet, MakePublicViewSet, MakePrivateViewSet, SearchViewSet
+from .views import NoteViewSet, ShareViewSet, UnShareViewSet, MakePublicViewSet, MakePrivateViewSet, SearchViewSet, CacheStatsViewSet, BatchViewSet, BulkShareViewSet, SyncViewSet, ExportViewSet, ImportViewSet, JobViewSet
+from .async_views import AsyncNoteListView, AsyncNoteDetailView, AsyncSearchView, AsyncShareView
 from django.urls import path, include
 
 notes_router = routers.DefaultRouter()
 notes_router.register(r'notes', NoteViewSet, basename='note')
 
 urlpatterns = [
+    path('notes/batch/', BatchViewSet.as_view({'post': 'batch'}), name='batch-notes'),
+    path('notes/share/', BulkShareViewSet.as_view({'post': 'share'}), name='bulk-share-notes'),
+    path('notes/unshare/', BulkShareViewSet.as_view({'post': 'unshare'}), name='bulk-unshare-notes'),
+    path('notes/export/', ExportViewSet.as_view({'get': 'export'}), name='export-notes'),
+    path('notes/import/', ImportViewSet.as_view({'post': 'import_notes'}), name='import-notes'),
     path('', include(notes_router.urls)),
     path('notes/<pk>/share/', ShareViewSet.as_view({'post': 'share'}), name='share-note'),
     path('notes/<pk>/unshare/', UnShareViewSet.as_view({'post': 'unshare'}), name='unshare-note'),
     path('notes/<pk>/make-public/', MakePublicViewSet.as_view({'post': 'make_public'}), name='make-public-note'),
     path('notes/<pk>/make-private/', MakePrivateViewSet.as_view({'post': 'make_private'}), name='make-private-note'),
+    path('sync/', SyncViewSet.as_view({'get': 'sync'}), name='sync-notes'),
     path('search/', SearchViewSet.as_view({'get': 'search'}), name='search-notes'),
+    path('jobs/<int:pk>/', JobViewSet.as_view({'get': 'retrieve'}), name='job-detail'),
+    path('cache-stats/', CacheStatsViewSet.as_view({'get': 'stats'}), name='cache-stats'),
+    # Async-native variants for ASGI deployments (see notes/async_views.py).
+    path('async/notes/', AsyncNoteListView.as_view(), name='async-note-list'),
+    path('async/notes/<int:pk>/', AsyncNoteDetailView.as_view(), name='async-note-detail'),
+    path('async/notes/<int:pk>/share/', AsyncShareView.as_view(), name='async-share-note'),
+    path('async/notes/<int:pk>/unshare/', AsyncShareView.as_view(share=False), name='async-unshare-note'),
+    path('async/search/', AsyncSearchView.as_view(), name='async-search-notes'),
 ]
 
@@ -1,24 +1,76 @@
+import zipfile
+from contextlib import nullcontext
 from rest_framework.viewsets import ViewSet
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Note
-from .serializers import NoteSerializer
+from rest_framework.utils.urls import replace_query_param
+from .models import Job, Note, NoteChange
+from .serializers import JobSerializer, NoteContentSerializer, NoteSerializer, NoteReadSerializer
+from .pagination import NoteCursorPagination, NoteSearchPagination
+from .search import (
+    SEARCH_SCOPES, SEARCH_TYPES, build_search_query, filter_search_scope, get_snippets,
+    search_filter_and_score, trigram_threshold,
+)
+from .sync import encode_sync_token, decode_sync_token, sync_retention_cutoff
+from .export import EXPORT_FORMATS, compress_if_accepted, stream_notes
+from .importer import IMPORT_FORMATS, READERS, import_format, import_notes, stream_progress
+from .jobs import enqueue
+from .sharing import apply_sharing
+from .cache import get_or_load_note, get_or_load_search, cache_stats, search_cache_stats, invalidate_notes, invalidate_searches
 from .models import UserData
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db.models import F
+from django.db import transaction
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.conf import settings
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from rest_framework.throttling import UserRateThrottle
-from rest_framework.throttling import AnonRateThrottle
+from core.routers import ReplicaReadsMixin
+from core.throttling import SharedUserRateThrottle, SharedAnonRateThrottle
 
-class NoteViewSet(ViewSet):
+defer_parameter = openapi.Parameter('defer', openapi.IN_QUERY, description='Queue the change as a background job and answer 202 with its id', type=openapi.TYPE_BOOLEAN)
+fields_parameter = openapi.Parameter('fields', openapi.IN_QUERY, description='Comma separated list of note fields to return, e.g. id,title,date_modified', type=openapi.TYPE_STRING)
+
+def get_requested_fields(request):
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(',') if field.strip()]
+
+def select_requested_fields(queryset, fields):
+    # Avoid loading columns (e.g. content) that the client did not ask for, and
+    # prefetch shared_with in one query instead of one query per note.
+    if fields is None or 'shared_with' in fields:
+        queryset = queryset.prefetch_related('shared_with')
+    if fields is None:
+        return queryset
+    columns = {field.name for field in Note._meta.concrete_fields} & set(fields)
+    return queryset.only('id', 'public', 'date_modified', *columns)
+
+def load_note_payload(pk):
+    """
+    Load the cached representation of note `pk` in a single query, taking
+    shared_with from the readers array stored on the row.
+    """
+    return note_payload(Note.objects.defer('search_vector').get(pk=pk))
+
+def note_payload(note):
+    data = NoteReadSerializer(note, fields=[name for name in NoteReadSerializer.Meta.fields if name != 'shared_with']).data
+    data['shared_with'] = [user_id for user_id in note.readers if user_id != note.user_id]
+    return {name: data[name] for name in NoteReadSerializer.Meta.fields}
+
+class NoteViewSet(ReplicaReadsMixin, ViewSet):
     permission_classes = [IsAuthenticated]
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description='Opaque cursor from a previous page', type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description='Number of notes per page', type=openapi.TYPE_INTEGER),
+            fields_parameter,
         ],
         operation_summary="List all notes of the user.",
         responses={
@@ -26,9 +78,17 @@ class NoteViewSet(ViewSet):
         }
     )
     def list(self, request):
-        queryset = Note.objects.filter(user=request.user)
-        serializer = NoteSerializer(queryset, many=True)
-        return Response({'detail' : 'Notes Fetched Successfully', 'Notes' : serializer.data }, status=status.HTTP_200_OK)
+        fields = get_requested_fields(request)
+        queryset = select_requested_fields(Note.objects.filter(user=request.user), fields)
+        paginator = NoteCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = NoteReadSerializer(page, many=True, fields=fields)
+        return Response({
+            'detail' : 'Notes Fetched Successfully',
+            'Notes' : serializer.data,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        }, status=status.HTTP_200_OK)
     
     @swagger_auto_schema(
         manual_parameters=[
@@ -58,12 +118,13 @@ class NoteViewSet(ViewSet):
         serializer = NoteSerializer(data=data)
         if serializer.is_valid():
             serializer.save()
-            return Response({'detail' : 'Note Created Successfully', 'Note' : serializer.data }, status=status.HTTP_201_CREATED)
+            return Response({'detail' : 'Note Created Successfully', 'Note' : NoteReadSerializer(serializer.instance).data }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            fields_parameter,
         ],
         operation_summary="Retrieve a note.",
         responses={
@@ -73,11 +134,18 @@ class NoteViewSet(ViewSet):
         }
     )
     def retrieve(self, request, pk=None):
+        fields = get_requested_fields(request)
         try:
-            instance = Note.objects.get(pk=pk)
-            if instance.user == request.user or instance.public == True or request.user in instance.shared_with.all():
-                serializer = NoteSerializer(instance)
-                return Response({'detail': 'Note retrieved successfully', 'note': serializer.data}, status=status.HTTP_200_OK)
+            pk = int(pk)
+        except ValueError:
+            return Response({"detail": "Note not found."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            note = get_or_load_note(pk, lambda: load_note_payload(pk))
+            # Checked against the cached owner and sharing metadata.
+            if note['user'] == request.user.id or note['public'] or request.user.id in note['shared_with']:
+                if fields is not None:
+                    note = {name: value for name, value in note.items() if name in fields}
+                return Response({'detail': 'Note retrieved successfully', 'note': note}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": "You do not have permission to access this note."}, status=status.HTTP_403_FORBIDDEN)
         except Note.DoesNotExist:
@@ -106,17 +174,17 @@ class NoteViewSet(ViewSet):
     def update(self, request, pk=None):
         user = request.user
         try:
-            instance = Note.objects.get(pk=pk)
+            instance = Note.objects.with_access(request.user).get(pk=pk)
             data = {
                 'user': user.id,
                 'title': request.data.get('title'),
                 'content': request.data.get('content'),
             }
-            if instance.user == request.user:
+            if instance.is_owner:
                 serializer = NoteSerializer(instance, data=data, partial=True)
                 if serializer.is_valid():
                     serializer.save()
-                    return Response({'detail' : 'Note Updated Successfully', 'Note' : serializer.data }, status=status.HTTP_200_OK)
+                    return Response({'detail' : 'Note Updated Successfully', 'Note' : NoteReadSerializer(serializer.instance).data }, status=status.HTTP_200_OK)
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
             else:
                 return Response({"detail": "You do not have permission to update this note."}, status=status.HTTP_403_FORBIDDEN)
@@ -135,10 +203,9 @@ class NoteViewSet(ViewSet):
         }
     )
     def destroy(self, request, pk=None):
-        user = request.user
         try:
-            instance = Note.objects.get(pk=pk)
-            if instance.user == user:
+            instance = Note.objects.with_access(request.user).get(pk=pk)
+            if instance.is_owner:
                 instance.delete()
                 return Response({"detail": "Note Deleted Successfully."}, status=status.HTTP_200_OK)
             else:
@@ -146,85 +213,291 @@ class NoteViewSet(ViewSet):
         except Note.DoesNotExist:
             return Response({"detail": "Note not found."}, status=status.HTTP_404_NOT_FOUND)
 
-class ShareViewSet(ViewSet):
+class BatchViewSet(ViewSet):
     permission_classes = [IsAuthenticated]
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
-    
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
         ],
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
-            required=['email'],
+            required=['operations'],
             properties={
-                'email': openapi.Schema(type=openapi.TYPE_STRING, description='Email of the user to share the note with'),
+                'operations': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        required=['action'],
+                        properties={
+                            'action': openapi.Schema(type=openapi.TYPE_STRING, enum=['create', 'update', 'delete'], description='Operation to apply'),
+                            'id': openapi.Schema(type=openapi.TYPE_INTEGER, description='Id of the note (update and delete)'),
+                            'title': openapi.Schema(type=openapi.TYPE_STRING, description='Title of the note'),
+                            'content': openapi.Schema(type=openapi.TYPE_STRING, description='Content of the note'),
+                        },
+                    ),
+                ),
             },
         ),
-        operation_summary="Share a note with a user",
+        operation_summary="Create, update and delete many notes in one request.",
         responses={
+            status.HTTP_200_OK: "Batch processed, with one result per operation.",
+            status.HTTP_400_BAD_REQUEST: "Invalid batch.",
+        }
+    )
+    def batch(self, request):
+        operations = request.data.get('operations')
+        if not isinstance(operations, list) or not operations:
+            return Response({"detail": "Invalid batch."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > settings.NOTES_BATCH_MAX_OPERATIONS:
+            return Response({"detail": f"A batch can contain at most {settings.NOTES_BATCH_MAX_OPERATIONS} operations."}, status=status.HTTP_400_BAD_REQUEST)
+
+        note_ids = set()
+        for operation in operations:
+            if isinstance(operation, dict) and operation.get('action') in ('update', 'delete'):
+                try:
+                    note_ids.add(int(operation.get('id')))
+                except (TypeError, ValueError):
+                    pass
+        notes = {note.pk: note for note in Note.objects.with_access(request.user).filter(pk__in=note_ids)}
+
+        results = []
+        to_create, to_update, to_delete = [], [], []
+        seen_ids = set()
+        now = timezone.now()
+        for index, operation in enumerate(operations):
+            action = operation.get('action') if isinstance(operation, dict) else None
+            result = {'index': index, 'action': action}
+            results.append(result)
+            if action == 'create':
+                # Validated without the owner, which would cost a user lookup per note.
+                serializer = NoteContentSerializer(data={'title': operation.get('title'), 'content': operation.get('content')})
+                if not serializer.is_valid():
+                    result.update(status='error', errors=serializer.errors)
+                    continue
+                to_create.append((result, Note(user=request.user, **serializer.validated_data)))
+                continue
+            if action not in ('update', 'delete'):
+                result.update(status='error', detail='Unknown action.')
+                continue
+
+            try:
+                note = notes.get(int(operation.get('id')))
+            except (TypeError, ValueError):
+                note = None
+            if note is None:
+                result.update(status='error', detail='Note not found.')
+                continue
+            result['id'] = note.pk
+            if not note.is_owner:
+                result.update(status='error', detail=f'You do not have permission to {action} this note.')
+                continue
+            if note.pk in seen_ids:
+                result.update(status='error', detail='Note appears more than once in this batch.')
+                continue
+            seen_ids.add(note.pk)
+
+            if action == 'delete':
+                to_delete.append((result, note))
+                continue
+            data = {key: operation[key] for key in ('title', 'content') if key in operation}
+            serializer = NoteContentSerializer(note, data=data, partial=True)
+            if not serializer.is_valid():
+                result.update(status='error', errors=serializer.errors)
+                continue
+            for key, value in serializer.validated_data.items():
+                setattr(note, key, value)
+            note.date_modified = now
+            to_update.append((result, note))
+
+        # The search vector trigger fills search_vector within these statements.
+        with transaction.atomic():
+            created = Note.objects.bulk_create([note for _, note in to_create])
+            Note.objects.bulk_update([note for _, note in to_update], ['title', 'content', 'date_modified'])
+            Note.objects.filter(pk__in=[note.pk for _, note in to_delete]).delete()
+            invalidate_notes([note.pk for _, note in to_update])
+            # Bulk writes do not send post_save, so drop cached searches here.
+            changed = [note for _, note in to_update + to_delete]
+            invalidate_searches(
+                {request.user.pk, *(user_id for note in changed for user_id in note.readers)},
+                public=any(note.public for note in changed),
+            )
+
+        for (result, _), note in zip(to_create, created):
+            result.update(status='created', id=note.pk)
+        for result, _ in to_update:
+            result['status'] = 'updated'
+        for result, _ in to_delete:
+            result['status'] = 'deleted'
+        return Response({'detail': 'Batch processed', 'results': results}, status=status.HTTP_200_OK)
+
+def get_requested_emails(request):
+    if hasattr(request.data, 'getlist'):
+        emails = request.data.getlist('emails')
+    else:
+        emails = request.data.get('emails') or []
+    if isinstance(emails, str):
+        emails = [emails]
+    if not emails and request.data.get('email'):
+        emails = [request.data.get('email')]
+    if not isinstance(emails, list) or not all(isinstance(email, str) for email in emails):
+        return []
+    return list(dict.fromkeys(emails))
+
+def update_sharing(request, note_ids, share):
+    """
+    Share (or unshare) the given notes with every user in the request's
+    `email`/`emails`, resolving users with one query and writing the
+    shared_with rows in bulk.
+    """
+    verb = 'share' if share else 'unshare'
+    emails = get_requested_emails(request)
+    if not emails:
+        return Response({"detail": "Invalid email list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(emails) > settings.NOTES_BATCH_MAX_OPERATIONS or len(note_ids) > settings.NOTES_BATCH_MAX_OPERATIONS:
+        return Response({"detail": f"At most {settings.NOTES_BATCH_MAX_OPERATIONS} notes and emails can be {verb}d at once."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        note_ids = {int(pk) for pk in note_ids}
+    except (TypeError, ValueError):
+        return Response({"detail": "Note not found."}, status=status.HTTP_404_NOT_FOUND)
+
+    notes = list(Note.objects.with_access(request.user).filter(pk__in=note_ids).only('id', 'user'))
+    if len(notes) != len(note_ids):
+        return Response({"detail": "Note not found or User with this email does not exist."}, status=status.HTTP_404_NOT_FOUND)
+    if not all(note.is_owner for note in notes):
+        return Response({"detail": f"You do not have permission to {verb} this note."}, status=status.HTTP_403_FORBIDDEN)
+
+    users = dict(UserData.objects.filter(email__in=emails).values_list('email', 'id'))
+    unknown_emails = [email for email in emails if email not in users]
+    if not users:
+        return Response({"detail": "User with this email does not exist.", 'unknown_emails': unknown_emails}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.query_params.get('defer', '').lower() in ('1', 'true', 'yes'):
+        payload = {
+            'owner_id': request.user.pk, 'note_ids': sorted(note_ids), 'user_ids': list(users.values()), 'share': share,
+            # A sharing change requested after this one wins, even if it is applied first.
+            'requested_at': timezone.now().isoformat(),
+        }
+        job = enqueue('apply_sharing', payload, user=request.user)
+        return Response({"detail": f"{verb.capitalize()} queued.", 'job': job.pk, 'unknown_emails': unknown_emails}, status=status.HTTP_202_ACCEPTED)
+
+    apply_sharing(request.user.pk, note_ids, users.values(), share)
+    detail = f"Note {verb}d successfully." if len(note_ids) == 1 else f"Notes {verb}d successfully."
+    return Response({"detail": detail, 'unknown_emails': unknown_emails}, status=status.HTTP_200_OK)
+
+def sharing_request_body(verb):
+    return openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'email': openapi.Schema(type=openapi.TYPE_STRING, description=f'Email of the user to {verb} the note with'),
+            'emails': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING), description=f'Emails of the users to {verb} the note with'),
+        },
+    )
+
+def bulk_sharing_request_body(verb):
+    return openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['note_ids', 'emails'],
+        properties={
+            'note_ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER), description=f'Ids of the notes to {verb}'),
+            'emails': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING), description=f'Emails of the users to {verb} the notes with'),
+        },
+    )
+
+class ShareViewSet(ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+    
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            defer_parameter,
+        ],
+        request_body=sharing_request_body('share'),
+        operation_summary="Share a note with one or more users",
+        responses={
+            status.HTTP_202_ACCEPTED: "Share queued as a background job.",
             status.HTTP_200_OK: "Note shared successfully.",
+            status.HTTP_400_BAD_REQUEST: "Invalid email list.",
             status.HTTP_403_FORBIDDEN: "You do not have permission to share this note.",
             status.HTTP_404_NOT_FOUND: "Note not found or User with this email does not exist.",
         }
     )
     def share(self, request, pk=None):
-        try:
-            instance = Note.objects.get(pk=pk)
-            if instance.user == request.user:
-                email = request.data.get('email')
-                try:
-                    user = UserData.objects.get(email=email)
-                    instance.shared_with.add(user)
-                    return Response({"detail": "Note shared successfully."}, status=status.HTTP_200_OK)
-                except UserData.DoesNotExist:
-                    return Response({"detail": "User with this email does not exist."}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                return Response({"detail": "You do not have permission to share this note."}, status=status.HTTP_403_FORBIDDEN)
-        except Note.DoesNotExist:
-            return Response({"detail": "Note not found or User with this email does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        return update_sharing(request, [pk], share=True)
 
 class UnShareViewSet(ViewSet):
     permission_classes = [IsAuthenticated]
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            defer_parameter,
         ],
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            required=['email'],
-            properties={
-                'email': openapi.Schema(type=openapi.TYPE_STRING, description='Email of the user to unshare the note with'),
-            },
-        ),
-        operation_summary="Unshare a note with a user",
+        request_body=sharing_request_body('unshare'),
+        operation_summary="Unshare a note with one or more users",
         responses={
+            status.HTTP_202_ACCEPTED: "Unshare queued as a background job.",
             status.HTTP_200_OK: "Note unshared successfully.",
+            status.HTTP_400_BAD_REQUEST: "Invalid email list.",
             status.HTTP_403_FORBIDDEN: "You do not have permission to unshare this note.",
             status.HTTP_404_NOT_FOUND: "Note not found or User with this email does not exist.",
         }
     )
     def unshare(self, request, pk=None):
-        try:
-            instance = Note.objects.get(pk=pk)
-            if instance.user == request.user:
-                email = request.data.get('email')
-                try:
-                    user = UserData.objects.get(email=email)
-                    instance.shared_with.remove(user)
-                    return Response({"detail": "Note unshared successfully."}, status=status.HTTP_200_OK)
-                except UserData.DoesNotExist:
-                    return Response({"detail": "User with this email does not exist."}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                return Response({"detail": "You do not have permission to unshare this note."}, status=status.HTTP_403_FORBIDDEN)
-        except Note.DoesNotExist:
-            return Response({"detail": "Note not found or User with this email does not exist."}, status=status.HTTP_404_NOT_FOUND)
+        return update_sharing(request, [pk], share=False)
+
+class BulkShareViewSet(ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            defer_parameter,
+        ],
+        request_body=bulk_sharing_request_body('share'),
+        operation_summary="Share many notes with many users",
+        responses={
+            status.HTTP_202_ACCEPTED: "Share queued as a background job.",
+            status.HTTP_200_OK: "Notes shared successfully.",
+            status.HTTP_400_BAD_REQUEST: "Invalid note or email list.",
+            status.HTTP_403_FORBIDDEN: "You do not have permission to share this note.",
+            status.HTTP_404_NOT_FOUND: "Note not found or User with this email does not exist.",
+        }
+    )
+    def share(self, request):
+        note_ids = request.data.get('note_ids')
+        if not isinstance(note_ids, list) or not note_ids:
+            return Response({"detail": "Invalid note list."}, status=status.HTTP_400_BAD_REQUEST)
+        return update_sharing(request, note_ids, share=True)
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            defer_parameter,
+        ],
+        request_body=bulk_sharing_request_body('unshare'),
+        operation_summary="Unshare many notes with many users",
+        responses={
+            status.HTTP_202_ACCEPTED: "Unshare queued as a background job.",
+            status.HTTP_200_OK: "Notes unshared successfully.",
+            status.HTTP_400_BAD_REQUEST: "Invalid note or email list.",
+            status.HTTP_403_FORBIDDEN: "You do not have permission to unshare this note.",
+            status.HTTP_404_NOT_FOUND: "Note not found or User with this email does not exist.",
+        }
+    )
+    def unshare(self, request):
+        note_ids = request.data.get('note_ids')
+        if not isinstance(note_ids, list) or not note_ids:
+            return Response({"detail": "Invalid note list."}, status=status.HTTP_400_BAD_REQUEST)
+        return update_sharing(request, note_ids, share=False)
         
 class MakePublicViewSet(ViewSet):
     permission_classes = [IsAuthenticated]
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         manual_parameters=[
@@ -239,10 +512,10 @@ class MakePublicViewSet(ViewSet):
     )
     def make_public(self, request, pk=None):
         try:
-            instance = Note.objects.get(pk=pk)
-            if instance.user == request.user:
+            instance = Note.objects.with_access(request.user).get(pk=pk)
+            if instance.is_owner:
                 instance.public = True
-                instance.save()
+                instance.save(update_fields=['public', 'date_modified'])
                 return Response({"detail": "Note made public successfully."}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": "You do not have permission to make this note public."}, status=status.HTTP_403_FORBIDDEN)
@@ -251,7 +524,7 @@ class MakePublicViewSet(ViewSet):
         
 class MakePrivateViewSet(ViewSet):
     permission_classes = [IsAuthenticated]
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         manual_parameters=[
@@ -266,26 +539,71 @@ class MakePrivateViewSet(ViewSet):
     )
     def make_private(self, request, pk=None):
         try:
-            instance = Note.objects.get(pk=pk)
-            if instance.user == request.user:
+            instance = Note.objects.with_access(request.user).get(pk=pk)
+            if instance.is_owner:
                 instance.public = False
-                instance.save()
+                instance.save(update_fields=['public', 'date_modified'])
                 return Response({"detail": "Note made private successfully."}, status=status.HTTP_200_OK)
             else:
                 return Response({"detail": "You do not have permission to make this note private."}, status=status.HTTP_403_FORBIDDEN)
         except Note.DoesNotExist:
             return Response({"detail": "Note not found."}, status=status.HTTP_404_NOT_FOUND)
 
+NOTE_SEARCH_FIELDS = [field for field in NoteReadSerializer.Meta.fields if field != 'content']
+
+def parse_search_params(query_params):
+    """
+    Validate the search query parameters, raising ValueError with the
+    message to return to the client.
+    """
+    search_query = query_params.get('q', '')
+    if not search_query.strip():
+        raise ValueError("Invalid search query.")
+    search_type = query_params.get('type', 'websearch')
+    if search_type not in SEARCH_TYPES:
+        raise ValueError("Invalid search type.")
+    scope = query_params.get('scope', 'own')
+    if scope not in SEARCH_SCOPES:
+        raise ValueError("Invalid search scope.")
+    try:
+        min_rank = float(query_params.get('min_rank', settings.NOTES_SEARCH_MIN_RANK))
+    except ValueError:
+        raise ValueError("Invalid min_rank.")
+    fuzzy = query_params.get('fuzzy', '').lower() in ('1', 'true', 'yes')
+    return {'q': search_query, 'type': search_type, 'scope': scope, 'min_rank': min_rank, 'fuzzy': fuzzy}
+
+def build_search_queryset(params, user):
+    query = build_search_query(params['q'], params['type'])
+    match, score = search_filter_and_score(params['q'], query, fuzzy=params['fuzzy'])
+    # The match filter is answered by the GIN indexes; rank is only computed for matches.
+    queryset = filter_search_scope(Note.objects.filter(match), params['scope'], user).annotate(
+        rank=score
+    ).filter(rank__gte=params['min_rank']).order_by('-rank', 'id')
+    return queryset, query
+
+def search_cache_params(params, fields, paginator):
+    return {
+        **params, 'q': ' '.join(params['q'].split()), 'fields': fields,
+        'limit': paginator.limit, 'offset': paginator.offset,
+    }
+
 class SearchViewSet(ViewSet):
     permission_classes = [IsAuthenticated]
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         manual_parameters=[
             openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
             openapi.Parameter(
                 'q', openapi.IN_QUERY, description='Search query', type=openapi.TYPE_STRING
-            )
+            ),
+            openapi.Parameter('type', openapi.IN_QUERY, description='Query syntax: websearch (default; "phrases", -negation, OR, prefix*), plain or phrase', type=openapi.TYPE_STRING, enum=list(SEARCH_TYPES)),
+            openapi.Parameter('scope', openapi.IN_QUERY, description='Notes to search: own (default), shared with you, public, or all of them', type=openapi.TYPE_STRING, enum=list(SEARCH_SCOPES)),
+            openapi.Parameter('fuzzy', openapi.IN_QUERY, description='Also match misspelled words by trigram similarity', type=openapi.TYPE_BOOLEAN),
+            openapi.Parameter('min_rank', openapi.IN_QUERY, description='Drop matches ranked below this value', type=openapi.TYPE_NUMBER),
+            openapi.Parameter('limit', openapi.IN_QUERY, description='Number of results per page', type=openapi.TYPE_INTEGER),
+            openapi.Parameter('offset', openapi.IN_QUERY, description='Index of the first result', type=openapi.TYPE_INTEGER),
+            openapi.Parameter('fields', openapi.IN_QUERY, description='Comma separated list of fields to return. Defaults to every note field except content, plus a highlighted snippet; include content to get the full body.', type=openapi.TYPE_STRING),
         ],
         operation_summary="Search notes",
         responses={
@@ -294,15 +612,200 @@ class SearchViewSet(ViewSet):
         }
     )
     def search(self, request):
-        search_query = request.query_params.get('q', '')
-        if not search_query:
-            return Response({"detail": "Invalid search query."}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = Note.objects.filter(
-            user=request.user,
-            search_vector=SearchQuery(search_query)
-        ).annotate(
-            rank=SearchRank(F('search_vector'), SearchQuery(search_query))
-        ).order_by('-rank')
-
-        serializer = NoteSerializer(queryset, many=True)
-        return Response({'detail': 'List of notes matching the search query', 'notes': serializer.data}, status=status.HTTP_200_OK)
\ No newline at end of file
+        try:
+            params = parse_search_params(request.query_params)
+        except ValueError as error:
+            return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        queryset, query = build_search_queryset(params, request.user)
+        # The full body is only sent when content is explicitly requested.
+        fields = get_requested_fields(request) or [*NOTE_SEARCH_FIELDS, 'snippet']
+        queryset = select_requested_fields(queryset, fields)
+        paginator = NoteSearchPagination()
+
+        def load():
+            with trigram_threshold(settings.NOTES_SEARCH_TRIGRAM_THRESHOLD) if params['fuzzy'] else nullcontext():
+                page = paginator.paginate_queryset(queryset, request, view=self)
+            notes = NoteReadSerializer(page, many=True, fields=fields).data
+            if 'snippet' in fields:
+                snippets = get_snippets([note.pk for note in page], query)
+                for note, data in zip(page, notes):
+                    data['snippet'] = snippets.get(note.pk, '')
+            return {'notes': notes, 'has_next': paginator.has_next}
+
+        paginator.bind(request)
+        result = get_or_load_search(
+            request.user.pk, search_cache_params(params, fields, paginator), load, public=params['scope'] in ('public', 'all'),
+        )
+        paginator.has_next = result['has_next']
+        return Response({
+            'detail': 'List of notes matching the search query',
+            'notes': result['notes'],
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
+        }, status=status.HTTP_200_OK)
+
+class CacheStatsViewSet(ViewSet):
+    permission_classes = [IsAdminUser]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+        ],
+        operation_summary="Note and search cache hit/miss counters (admin only)",
+        responses={
+            status.HTTP_200_OK: "Cache statistics.",
+            status.HTTP_403_FORBIDDEN: "You do not have permission to perform this action.",
+        }
+    )
+    def stats(self, request):
+        return Response({'detail': 'Cache statistics', 'notes': cache_stats(), 'search': search_cache_stats()}, status=status.HTTP_200_OK)
+
+class SyncViewSet(ReplicaReadsMixin, ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            openapi.Parameter('since', openapi.IN_QUERY, description='Token returned by the previous sync. Omit for a full sync.', type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description='Full sync only: opaque cursor from the previous page', type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description='Full sync only: number of notes per page', type=openapi.TYPE_INTEGER),
+            fields_parameter,
+        ],
+        operation_summary="Notes changed since a sync token",
+        responses={
+            status.HTTP_200_OK: "Changed notes, deleted note ids and the next sync token.",
+            status.HTTP_400_BAD_REQUEST: "Invalid sync token.",
+            status.HTTP_410_GONE: "Sync token older than NOTES_SYNC_RETENTION_DAYS, do a full sync.",
+        }
+    )
+    def sync(self, request):
+        now = timezone.now()
+        since = request.query_params.get('since')
+        notes = Note.objects.accessible_to(request.user)
+        deleted = []
+        if since:
+            try:
+                since = decode_sync_token(since)
+            except ValueError:
+                return Response({"detail": "Invalid sync token."}, status=status.HTTP_400_BAD_REQUEST)
+            if since < sync_retention_cutoff(now):
+                # The tombstones since then may have been pruned.
+                return Response({"detail": "Sync token expired, do a full sync."}, status=status.HTTP_410_GONE)
+            changes = NoteChange.objects.filter(user=request.user, date__gt=since)
+            shared_ids = changes.filter(kind=NoteChange.SHARED).values('note_id')
+            notes = notes.filter(Q(date_modified__gt=since) | Q(pk__in=shared_ids))
+            removed_ids = set(changes.filter(kind__in=[NoteChange.UNSHARED, NoteChange.DELETED]).values_list('note_id', flat=True))
+            # A note removed and then shared again (or re-created) is not a tombstone.
+            still_accessible = set(Note.objects.accessible_to(request.user).filter(pk__in=removed_ids).values_list('pk', flat=True))
+            deleted = sorted(removed_ids - still_accessible)
+
+        fields = get_requested_fields(request)
+        notes = select_requested_fields(notes.order_by('date_modified', 'id'), fields)
+        if since:
+            serializer = NoteReadSerializer(notes, many=True, fields=fields)
+            return Response({
+                'detail': 'Changes since token',
+                'notes': serializer.data,
+                'deleted': deleted,
+                'token': encode_sync_token(now),
+            }, status=status.HTTP_200_OK)
+
+        # A full sync is paged. Every page carries the token from the first
+        # one, so changes made while the client pages through are sent again
+        # by the next sync, and the client only gets the token with the last page.
+        token = request.query_params.get('token')
+        if token:
+            try:
+                decode_sync_token(token)
+            except ValueError:
+                return Response({"detail": "Invalid sync token."}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            token = encode_sync_token(now)
+        paginator = NoteCursorPagination()
+        page = paginator.paginate_queryset(notes, request, view=self)
+        next_link = paginator.get_next_link()
+        serializer = NoteReadSerializer(page, many=True, fields=fields)
+        return Response({
+            'detail': 'Changes since token',
+            'notes': serializer.data,
+            'deleted': deleted,
+            'next': replace_query_param(next_link, 'token', token) if next_link else None,
+            'token': None if next_link else token,
+        }, status=status.HTTP_200_OK)
+
+class ExportViewSet(ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            openapi.Parameter('output', openapi.IN_QUERY, description='ndjson (one note per line, the default) or json (a single array)', type=openapi.TYPE_STRING, enum=list(EXPORT_FORMATS)),
+            fields_parameter,
+        ],
+        operation_summary="Export all notes of the user",
+        responses={
+            status.HTTP_200_OK: "The notes, streamed. Gzip encoded when the client sends Accept-Encoding: gzip.",
+            status.HTTP_400_BAD_REQUEST: "Invalid output format.",
+        }
+    )
+    def export(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return Response({"detail": f"output must be one of {', '.join(EXPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        fields = get_requested_fields(request)
+        notes = select_requested_fields(Note.objects.filter(user=request.user).order_by('id'), fields)
+        response = StreamingHttpResponse(stream_notes(notes, export_format, fields), content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="notes.{export_format}"'
+        return compress_if_accepted(request, response)
+
+class ImportViewSet(ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+    parser_classes = [MultiPartParser]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+            openapi.Parameter('file', openapi.IN_FORM, description='An NDJSON file (.ndjson or .jsonl) of {"title", "content"} objects, or a .zip of Markdown files', type=openapi.TYPE_FILE, required=True),
+        ],
+        operation_summary="Import notes from a file",
+        responses={
+            status.HTTP_200_OK: "Progress streamed as NDJSON: running totals and errors after each chunk, then the final totals.",
+            status.HTTP_400_BAD_REQUEST: "Missing or unsupported file.",
+        }
+    )
+    def import_notes(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Upload the notes in the file field."}, status=status.HTTP_400_BAD_REQUEST)
+        file_format = import_format(upload.name)
+        if file_format is None:
+            return Response({"detail": f"Unsupported file type, upload one of {', '.join(IMPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+        if file_format == 'markdown' and not zipfile.is_zipfile(upload):
+            return Response({"detail": "Invalid zip archive."}, status=status.HTTP_400_BAD_REQUEST)
+        progress = import_notes(request.user, READERS[file_format](upload))
+        return StreamingHttpResponse(stream_progress(progress), content_type='application/x-ndjson')
+
+class JobViewSet(ViewSet):
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('Authorization', openapi.IN_HEADER, description='Authorization header with Bearer token', type=openapi.TYPE_STRING, format=openapi.FORMAT_SLUG, default='Bearer <your_token_here>'),
+        ],
+        operation_summary="Status of a background job",
+        responses={
+            status.HTTP_200_OK: "Job retrieved successfully.",
+            status.HTTP_404_NOT_FOUND: "Job not found.",
+        }
+    )
+    def retrieve(self, request, pk=None):
+        try:
+            job = Job.objects.get(pk=pk, user=request.user)
+        except Job.DoesNotExist:
+            return Response({"detail": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'detail': 'Job retrieved successfully', 'job': JobSerializer(job).data}, status=status.HTTP_200_OK)
@@ -0,0 +1,111 @@
+"""
+JWT authentication that does not load the user from Postgres on every
+request.
+
+Only what check_user() needs is cached for AUTH_USER_CACHE_TIMEOUT
+seconds: the user's pk, is_active and, with CHECK_REVOKE_TOKEN, the hash of
+their password hash. On a hit the user is built from those with every other
+field deferred, so reading one loads it from the database. Saving or
+deleting the user (including deactivation and password changes) drops the
+entry, see users/signals.py. The cache is only used when NOTE_CACHE_SHARED
+says every worker sees it.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_ALIAS = 'notes'
+
+
+def _user_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache = caches[USER_CACHE_ALIAS]
+    cache.delete(_user_key(user_id))
+    # Drop it again after commit, in case a request cached the old row meanwhile.
+    transaction.on_commit(lambda: cache.delete(_user_key(user_id)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication with the user read through a short-lived cache. The
+    async variants are used by the views in notes/async_views.py.
+    """
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        if not settings.NOTE_CACHE_SHARED:
+            return super().get_user(validated_token)
+        cache = caches[USER_CACHE_ALIAS]
+        entry = cache.get(_user_key(user_id))
+        if entry is not None:
+            return self.check_user(self.cached_user(entry), validated_token, entry.get('revoke_hash'))
+        try:
+            user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        cache.set(_user_key(user_id), self.cache_entry(user), timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        cache = caches[USER_CACHE_ALIAS]
+        if settings.NOTE_CACHE_SHARED:
+            entry = await cache.aget(_user_key(user_id))
+            if entry is not None:
+                return self.check_user(self.cached_user(entry), validated_token, entry.get('revoke_hash'))
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if settings.NOTE_CACHE_SHARED:
+            await cache.aset(_user_key(user_id), self.cache_entry(user), timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user, validated_token)
+
+    def cache_entry(self, user):
+        entry = {'pk': user.pk, 'is_active': user.is_active}
+        if api_settings.CHECK_REVOKE_TOKEN:
+            entry['revoke_hash'] = get_md5_hash_password(user.password)
+        return entry
+
+    def cached_user(self, entry):
+        """The user with only pk and is_active loaded."""
+        values = {self.user_model._meta.pk.attname: entry['pk'], 'is_active': entry['is_active']}
+        field_names = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in values]
+        return self.user_model.from_db(None, field_names, [values[name] for name in field_names])
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def check_user(self, user, validated_token, revoke_hash=None):
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if revoke_hash is None:
+                revoke_hash = get_md5_hash_password(user.password)
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != revoke_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from .hashers import check_password_hash, hash_password
+
+UserModel = get_user_model()
+
+
+class PooledHashingBackend(ModelBackend):
+    """
+    ModelBackend that verifies passwords in the hashing pool (see
+    users/hashers.py) and rehashes them with the current hasher and cost
+    after a successful login.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway, so unknown emails take as long as wrong passwords.
+            hash_password(password)
+            return None
+
+        is_correct, must_update = check_password_hash(password, user.password)
+        if not is_correct or not self.user_can_authenticate(user):
+            return None
+        if must_update:
+            user.password = hash_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -0,0 +1,158 @@
+"""
+Fast negative lookups for the refresh token blacklist.
+
+simplejwt checks every refresh token against BlacklistedToken with a join
+over the token tables, which only grow. Each process keeps a Bloom filter
+of the blacklisted jtis instead, so a token that was never blacklisted (the
+common case) is accepted without a query. A possible match is confirmed
+against the database as before.
+
+The filters are kept in sync through the shared cache. Each committed
+blacklist entry increments a version key and stores its jti under that
+version, so a process that falls behind only fetches the missing entries.
+If any are gone, or pruning bumped the epoch, it rebuilds its filter from
+the database.
+
+Without a shared cache (NOTE_CACHE_SHARED) the filter is not used.
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+CACHE_ALIAS = 'notes'
+VERSION_KEY = 'token_blacklist:version'
+EPOCH_KEY = 'token_blacklist:epoch'
+# A process further behind than this rebuilds instead of catching up.
+MAX_CATCH_UP = 1000
+ENTRY_TIMEOUT = 24 * 60 * 60
+
+
+class BloomFilter:
+    def __init__(self, bits, hashes):
+        self.size = bits
+        self.hashes = hashes
+        self.bits = bytearray((bits + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+def _new_version():
+    return int(time.time() * 1000)
+
+
+def _entry_key(version):
+    return f'token_blacklist:entry:{version}'
+
+
+def _bump(key):
+    cache = caches[CACHE_ALIAS]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _new_version(), timeout=None)
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bloom = None
+        self.epoch = None
+        self.version = None
+
+    def _shared_state(self):
+        cache = caches[CACHE_ALIAS]
+        state = cache.get_many([EPOCH_KEY, VERSION_KEY])
+        if len(state) < 2:
+            for key in (EPOCH_KEY, VERSION_KEY):
+                cache.add(key, _new_version(), timeout=None)
+            state = cache.get_many([EPOCH_KEY, VERSION_KEY])
+        return state.get(EPOCH_KEY), state.get(VERSION_KEY)
+
+    def sync(self):
+        epoch, version = self._shared_state()
+        if epoch == self.epoch and version == self.version:
+            return
+        with self._lock:
+            if epoch == self.epoch and self.version is not None and 0 < version - self.version <= MAX_CATCH_UP:
+                keys = [_entry_key(number) for number in range(self.version + 1, version + 1)]
+                entries = caches[CACHE_ALIAS].get_many(keys)
+                if len(entries) == len(keys):
+                    for jti in entries.values():
+                        self.bloom.add(jti)
+                    self.version = version
+                    return
+            self._rebuild(epoch, version)
+
+    def _rebuild(self, epoch, version):
+        # The version was read before this query, so entries committed
+        # meanwhile are published under a later version.
+        bloom = BloomFilter(settings.TOKEN_BLACKLIST_BLOOM_BITS, settings.TOKEN_BLACKLIST_BLOOM_HASHES)
+        jtis = BlacklistedToken.objects.filter(token__expires_at__gt=aware_utcnow()).values_list('token__jti', flat=True)
+        for jti in jtis.iterator():
+            bloom.add(jti)
+        self.bloom, self.epoch, self.version = bloom, epoch, version
+
+    def might_be_blacklisted(self, jti):
+        self.sync()
+        return jti in self.bloom
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+def get_blacklist_filter():
+    global _filter
+    if _filter is None:
+        with _filter_lock:
+            if _filter is None:
+                _filter = BlacklistFilter()
+    return _filter
+
+
+def _publish(jti):
+    cache = caches[CACHE_ALIAS]
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        # Without a version to continue from, every process rebuilds.
+        cache.set(VERSION_KEY, _new_version(), timeout=None)
+        return
+    cache.set(_entry_key(version), jti, timeout=ENTRY_TIMEOUT)
+
+
+def blacklist_changed(jti):
+    transaction.on_commit(lambda: _publish(jti))
+
+
+def blacklist_pruned():
+    _bump(EPOCH_KEY)
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    RefreshToken that only queries the blacklist when the filter matches.
+    Without NOTE_CACHE_SHARED other processes' blacklist entries never reach
+    this one's filter, so every token is checked against the database.
+    """
+    def check_blacklist(self):
+        if not settings.NOTE_CACHE_SHARED or get_blacklist_filter().might_be_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
@@ -0,0 +1,86 @@
+"""
+Password hashers with their cost taken from settings, and a bounded pool to
+run them in.
+
+PASSWORD_HASHER picks the hasher new passwords are stored with; the others
+stay in PASSWORD_HASHERS so existing hashes still verify. Hashes made with
+another hasher or other parameters are upgraded on the next login (see
+users/backends.py). A parameter left at 0 keeps Django's default.
+
+Hashing is CPU bound and takes tens of milliseconds. It runs in a pool of
+PASSWORD_HASH_WORKERS threads (hashlib and argon2-cffi release the GIL), so
+a burst of signups or logins cannot use more cores than that however many
+requests are in flight.
+"""
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+    make_password,
+    verify_password,
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS or PBKDF2PasswordHasher.iterations
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR or ScryptPasswordHasher.work_factor
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE or ScryptPasswordHasher.block_size
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM or ScryptPasswordHasher.parallelism
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        # hashlib refuses more than 32 MB by default and scrypt needs about
+        # 128 * r * (n + p) bytes. Sized per hash, so hashes made with a
+        # higher cost than the current one still verify (and are upgraded).
+        hash_ = hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=128 * r * (2 * n + p), dklen=64)
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Requires argon2-cffi (`pip install argon2-cffi`)."""
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST or Argon2PasswordHasher.time_cost
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST or Argon2PasswordHasher.memory_cost
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM or Argon2PasswordHasher.parallelism
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_hash_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+    return _executor
+
+
+def hash_password(password):
+    """make_password() run in the hashing pool."""
+    return get_hash_executor().submit(make_password, password).result()
+
+
+def check_password_hash(password, encoded):
+    """
+    verify_password() run in the hashing pool. Returns (is_correct,
+    must_update) like verify_password().
+    """
+    return get_hash_executor().submit(verify_password, password, encoded).result()
+
+
+def hash_passwords(passwords):
+    """Hash several passwords across the pool, e.g. for a bulk import."""
+    return list(get_hash_executor().map(make_password, passwords))
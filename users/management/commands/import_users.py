@@ -0,0 +1,93 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from users.hashers import hash_passwords
+from users.models import UserData
+
+NAME_MAX_LENGTH = UserData._meta.get_field('name').max_length
+
+
+def read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Reported with the row's number by build_users().
+                yield ValidationError('Invalid JSON.')
+
+
+READERS = {'csv': read_csv, 'jsonl': read_jsonl}
+
+
+class Command(BaseCommand):
+    help = (
+        'Create users from a CSV or JSON Lines file with email, name and optional password columns. '
+        'Users without a password get an unusable one. Existing emails are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import; the format is taken from its extension unless --format is given.')
+        parser.add_argument('--format', choices=sorted(READERS), help='Input format.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of users inserted per statement.')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Unknown format {file_format!r}, pass --format csv or --format jsonl.')
+
+        created = skipped = 0
+        with path.open(newline='', encoding='utf-8') as file:
+            rows = enumerate(READERS[file_format](file), start=1)
+            while batch := list(islice(rows, options['batch_size'])):
+                users, invalid = self.build_users(batch)
+                skipped += invalid
+                existing = set(UserData.objects.filter(email__in=[user.email for user in users]).values_list('email', flat=True))
+                new_users = [user for user in users if user.email not in existing]
+                for user, password in zip(new_users, hash_passwords(user.password for user in new_users)):
+                    user.password = password
+                # Conflicts can only come from concurrent signups now.
+                UserData.objects.bulk_create(new_users, ignore_conflicts=True)
+                created += len(new_users)
+                skipped += len(users) - len(new_users)
+                self.stdout.write(f'Imported {created} users...')
+
+        self.stdout.write(self.style.SUCCESS(f'Imported {created} users, skipped {skipped}.'))
+
+    def build_users(self, batch):
+        users = {}
+        invalid = 0
+        for line, row in batch:
+            try:
+                if isinstance(row, ValidationError):
+                    raise row
+                if not isinstance(row, dict):
+                    raise ValidationError('Row must be an object.')
+                email, name, password = (row.get(field) or '' for field in ('email', 'name', 'password'))
+                if not all(isinstance(value, str) for value in (email, name, password)):
+                    raise ValidationError('Email, name and password must be strings.')
+                email = UserData.objects.normalize_email(email.strip())
+                name = name.strip()
+                validate_email(email)
+                if not name or len(name) > NAME_MAX_LENGTH:
+                    raise ValidationError(f'Name must be 1 to {NAME_MAX_LENGTH} characters.')
+            except ValidationError as e:
+                self.stderr.write(f'Row {line}: {" ".join(e.messages)}')
+                invalid += 1
+                continue
+            if email in users:
+                invalid += 1
+                continue
+            # Hashed per batch in the pool; None becomes an unusable password.
+            users[email] = UserData(email=email, name=name, password=password or None)
+        return list(users.values()), invalid
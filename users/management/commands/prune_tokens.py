@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from users.blacklist import blacklist_pruned
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding and blacklisted refresh tokens in batches. Meant to run from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of tokens deleted per transaction.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to pause between batches.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = aware_utcnow()
+        ids = OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk').values_list('pk', flat=True)
+
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(ids.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            # Short transactions, so logins and refreshes are never blocked
+            # behind one long delete. Blacklist rows go with their tokens.
+            with transaction.atomic():
+                OutstandingToken.objects.filter(pk__in=batch).delete()
+            total += len(batch)
+            last_pk = batch[-1]
+            self.stdout.write(f'Pruned {total} expired tokens...')
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        if total:
+            blacklist_pruned()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {total} expired tokens.'))
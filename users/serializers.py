@@ -1,4 +1,7 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from .blacklist import FilteredRefreshToken
+from .hashers import hash_password
 from .models import UserData
 
 
@@ -9,7 +12,12 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ["id", "email", "name", "password"]
 
     def create(self, validated_data):
-        user = UserData.objects.create(email=validated_data['email'],name=validated_data['name'])
-        user.set_password(validated_data['password'])
-        user.save()
-        return user
+        return UserData.objects.create(
+            email=validated_data['email'],
+            name=validated_data['name'],
+            password=hash_password(validated_data['password']),
+        )
+
+
+class FilteredTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
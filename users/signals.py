@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from .authentication import invalidate_cached_user
+from .blacklist import blacklist_changed
+from .models import UserData
+
+
+@receiver(post_save, sender=UserData)
+@receiver(post_delete, sender=UserData)
+def invalidate_user_on_write(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def publish_blacklisted_token(sender, instance, created, **kwargs):
+    if created:
+        blacklist_changed(instance.token.jti)
@@ -0,0 +1,56 @@
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+from users.authentication import USER_CACHE_ALIAS, CachedJWTAuthentication
+from users.models import UserData as User
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        caches[USER_CACHE_ALIAS].clear()
+        self.user = User.objects.create_user(name='testuser', email='testuser@gmail.com', password='testpassword')
+        self.request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.authentication = CachedJWTAuthentication()
+
+    def test_user_is_cached(self):
+        with self.assertNumQueries(1):
+            self.authentication.authenticate(self.request)
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_change_invalidates(self):
+        self.authentication.authenticate(self.request)
+        self.user.name = 'renamed'
+        self.user.save()
+        user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user.name, 'renamed')
+
+    def test_deactivation_invalidates(self):
+        self.authentication.authenticate(self.request)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(self.request)
+
+    def test_deletion_invalidates(self):
+        self.authentication.authenticate(self.request)
+        self.user.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(self.request)
+
+    def test_password_is_not_cached(self):
+        self.authentication.authenticate(self.request)
+        entry = caches[USER_CACHE_ALIAS].get(f'auth:user:{self.user.pk}')
+        self.assertEqual(entry, {'pk': self.user.pk, 'is_active': True})
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate(self.request)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'testuser@gmail.com')
+
+    @override_settings(NOTE_CACHE_SHARED=False)
+    def test_unshared_cache_is_not_used(self):
+        self.authentication.authenticate(self.request)
+        self.assertIsNone(caches[USER_CACHE_ALIAS].get(f'auth:user:{self.user.pk}'))
+        with self.assertNumQueries(1):
+            self.authentication.authenticate(self.request)
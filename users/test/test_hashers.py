@@ -0,0 +1,63 @@
+from unittest import mock
+from django.contrib.auth.hashers import identify_hasher
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from users.hashers import TunedPBKDF2PasswordHasher, TunedScryptPasswordHasher, get_hash_executor
+from users.models import UserData as User
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.login_url = reverse('token-obtain-pair')
+        self.user = User.objects.create_user(name='testuser', email='testuser@gmail.com', password='testpassword')
+
+    def login(self, password='testpassword'):
+        return self.client.post(self.login_url, data={'email': 'testuser@gmail.com', 'password': password})
+
+    def test_login(self):
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login('wrongpassword').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_rehashes_when_cost_changes(self):
+        with mock.patch.object(TunedPBKDF2PasswordHasher, 'iterations', 1000):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).decode(self.user.password)['iterations'], 1000)
+        self.assertTrue(self.user.check_password('testpassword'))
+
+    def test_wrong_password_does_not_rehash(self):
+        password = self.user.password
+        with mock.patch.object(TunedPBKDF2PasswordHasher, 'iterations', 1000):
+            self.login('wrongpassword')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, password)
+
+    @override_settings(PASSWORD_HASHERS=['users.hashers.TunedScryptPasswordHasher', 'users.hashers.TunedPBKDF2PasswordHasher'])
+    def test_login_upgrades_to_preferred_hasher(self):
+        with mock.patch.object(TunedScryptPasswordHasher, 'work_factor', 2**10):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertEqual(identify_hasher(self.user.password).algorithm, 'scrypt')
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHERS=['users.hashers.TunedScryptPasswordHasher'])
+    def test_login_with_costlier_scrypt_hash(self):
+        with mock.patch.object(TunedScryptPasswordHasher, 'work_factor', 2**15):
+            self.user.set_password('testpassword')
+            self.user.save()
+        with mock.patch.object(TunedScryptPasswordHasher, 'work_factor', 2**14):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).decode(self.user.password)['work_factor'], 2**14)
+
+    def test_signup_hashes_password(self):
+        response = self.client.post(reverse('sign-up'), data={'name': 'new', 'email': 'new@gmail.com', 'password': 'testpassword'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.get(email='new@gmail.com').check_password('testpassword'))
+
+    @override_settings(PASSWORD_HASH_WORKERS=2)
+    def test_pool_is_bounded(self):
+        with mock.patch('users.hashers._executor', None):
+            self.assertEqual(get_hash_executor()._max_workers, 2)
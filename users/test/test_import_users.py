@@ -0,0 +1,67 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from users.models import UserData as User
+
+class ImportUsersTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        User.objects.create_user(name='existing', email='existing@example.com', password='testpassword')
+
+    def write(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def import_users(self, path, **options):
+        out, err = StringIO(), StringIO()
+        call_command('import_users', path, stdout=out, stderr=err, **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_csv(self):
+        path = self.write('users.csv', 'email,name,password\nalice@example.com,Alice,alicepassword\nbob@example.com,Bob,\n')
+        out, _ = self.import_users(path, batch_size=1)
+        self.assertIn('Imported 2 users, skipped 0.', out)
+        self.assertTrue(User.objects.get(email='alice@example.com').check_password('alicepassword'))
+        self.assertFalse(User.objects.get(email='bob@example.com').has_usable_password())
+
+    def test_import_jsonl_skips_existing_duplicate_and_invalid_rows(self):
+        rows = [
+            {'email': 'existing@example.com', 'name': 'Existing'},
+            {'email': 'carol@example.com', 'name': 'Carol', 'password': 'carolpassword'},
+            {'email': 'carol@example.com', 'name': 'Carol again'},
+            {'email': 'not-an-email', 'name': 'Nobody'},
+            {'email': 'dave@example.com', 'name': ''},
+        ]
+        path = self.write('users.jsonl', '\n'.join(json.dumps(row) for row in rows))
+        out, err = self.import_users(path)
+        self.assertIn('Imported 1 users, skipped 4.', out)
+        self.assertIn('Row 4:', err)
+        self.assertIn('Row 5:', err)
+        self.assertEqual(User.objects.get(email='carol@example.com').name, 'Carol')
+        self.assertEqual(User.objects.get(email='existing@example.com').name, 'existing')
+
+    def test_import_jsonl_skips_malformed_rows(self):
+        lines = [
+            '{"email": "erin@example.com", "name": "Erin"',
+            '["frank@example.com", "Frank"]',
+            '{"email": ["grace@example.com"], "name": "Grace"}',
+            '{"email": "heidi@example.com", "name": "Heidi", "password": 1234}',
+            '{"email": "ivan@example.com", "name": "Ivan"}',
+        ]
+        path = self.write('users.jsonl', '\n'.join(lines))
+        out, err = self.import_users(path)
+        self.assertIn('Imported 1 users, skipped 4.', out)
+        for line in range(1, 5):
+            self.assertIn(f'Row {line}:', err)
+        self.assertTrue(User.objects.filter(email='ivan@example.com').exists())
+
+    def test_unknown_format(self):
+        path = self.write('users.txt', '')
+        with self.assertRaises(CommandError):
+            self.import_users(path)
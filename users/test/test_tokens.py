@@ -0,0 +1,79 @@
+from datetime import timedelta
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from io import StringIO
+from unittest import mock
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from users.blacklist import CACHE_ALIAS, BlacklistFilter, FilteredRefreshToken, get_blacklist_filter
+from users.models import UserData as User
+
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        caches[CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(name='testuser', email='testuser@gmail.com', password='testpassword')
+
+    def test_unlisted_token_skips_blacklist_query(self):
+        token = str(FilteredRefreshToken.for_user(self.user))
+        get_blacklist_filter().sync()
+        with self.assertNumQueries(0):
+            FilteredRefreshToken(token)
+
+    def test_blacklisted_token_is_rejected(self):
+        token = FilteredRefreshToken.for_user(self.user)
+        FilteredRefreshToken(str(token))
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(token))
+
+    def test_refresh_after_logout_fails(self):
+        refresh = str(FilteredRefreshToken.for_user(self.user))
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('logout'), data={'refresh_token': refresh})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(reverse('token-refresh'), data={'refresh': refresh})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rebuild_after_missing_entries(self):
+        token = FilteredRefreshToken.for_user(self.user)
+        get_blacklist_filter().sync()
+        # Blacklisted without publishing, as if the cache entry was evicted.
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=OutstandingToken.objects.get(jti=token['jti']))])
+        caches[CACHE_ALIAS].incr('token_blacklist:version')
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(token))
+
+    @override_settings(NOTE_CACHE_SHARED=False)
+    def test_unshared_cache_checks_database(self):
+        token = FilteredRefreshToken.for_user(self.user)
+        other_process = BlacklistFilter()
+        other_process.sync()
+        # Blacklisted by a process whose cache this one does not see.
+        with self.captureOnCommitCallbacks(execute=False):
+            token.blacklist()
+        with mock.patch('users.blacklist._filter', other_process):
+            with self.assertRaises(TokenError):
+                FilteredRefreshToken(str(token))
+
+class PruneTokensCommandTests(TestCase):
+    def test_prunes_only_expired_tokens(self):
+        user = User.objects.create_user(name='testuser', email='testuser@gmail.com', password='testpassword')
+        past = timezone.now() - timedelta(days=1)
+        expired = [OutstandingToken.objects.create(user=user, jti=f'expired-{i}', token='t', expires_at=past) for i in range(5)]
+        BlacklistedToken.objects.create(token=expired[0])
+        live = FilteredRefreshToken.for_user(user)
+        live.blacklist()
+
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+        self.assertIn('Pruned 5 expired tokens.', out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
@@ -4,6 +4,7 @@ from rest_framework import status
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from users.models import UserData as User
+from users.serializers import UserSerializer
 
 class AuthenticationTests(TestCase):
     def setUp(self):
@@ -23,6 +24,13 @@ class AuthenticationTests(TestCase):
         response = self.client.post(self.register_url, data=self.user_data)
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_registration_is_a_single_insert(self):
+        serializer = UserSerializer(data=self.user_data)
+        self.assertTrue(serializer.is_valid())
+        with self.assertNumQueries(1):
+            user = serializer.save()
+        self.assertTrue(user.check_password(self.user_data['password']))
+
     def test_invalid_registration(self):
         invalid_data = {
             'name': '',
@@ -1,18 +1,17 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
-from .serializers import UserSerializer
+from .blacklist import FilteredRefreshToken
+from .serializers import UserSerializer, FilteredTokenRefreshSerializer
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from rest_framework.throttling import UserRateThrottle
-from rest_framework.throttling import AnonRateThrottle
+from core.throttling import SharedUserRateThrottle, SharedAnonRateThrottle
 
 class CustomTokenObtainPairView(TokenObtainPairView):
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -33,7 +32,8 @@ class CustomTokenObtainPairView(TokenObtainPairView):
         return super().post(request, *args, **kwargs)
 
 class CustomTokenRefreshView(TokenRefreshView):
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    serializer_class = FilteredTokenRefreshSerializer
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         request_body=openapi.Schema(
@@ -54,7 +54,7 @@ class CustomTokenRefreshView(TokenRefreshView):
 
 class LogoutView(APIView):
     permission_classes = (IsAuthenticated,)
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         manual_parameters=[
@@ -75,12 +75,12 @@ class LogoutView(APIView):
     )
     def post(self, request):
         refresh_token = self.request.data.get('refresh_token')
-        token = RefreshToken(token=refresh_token)
+        token = FilteredRefreshToken(token=refresh_token)
         token.blacklist()
         return Response({'detail': 'User logged out successfully.'}, status=status.HTTP_200_OK)
 
 class RegisterView(APIView):
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_classes = [SharedUserRateThrottle, SharedAnonRateThrottle]
     
     @swagger_auto_schema(
         request_body=openapi.Schema(